@@ -4,23 +4,40 @@ STEP to DXF Web Application
 Flask backend with Three.js frontend
 """
 
-from flask import Flask, request, jsonify, render_template, send_file, after_this_request
+from flask import Flask, request, render_template, send_file
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
+import io
 import os
-import json
 import tempfile
+import shutil
 from werkzeug.utils import secure_filename
 import uuid
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import gzip
+import re
+import logging
+import math
+import stat
+import numpy as np
 
 try:
     from OCC.Core.STEPControl import STEPControl_Reader
     from OCC.Core.TopExp import TopExp_Explorer
-    from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_VERTEX
+    from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_WIRE
     from OCC.Core.BRep import BRep_Tool
-    from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
-    from OCC.Core.GeomAbs import GeomAbs_Plane
+    from OCC.Core.BRepAdaptor import BRepAdaptor_Surface, BRepAdaptor_Curve
+    from OCC.Core.BRepTools import BRepTools_WireExplorer
+    from OCC.Core.BRepLProp import BRepLProp_SLProps
+    from OCC.Core.GeomAbs import GeomAbs_Plane, GeomAbs_Line, GeomAbs_Circle, GeomAbs_Ellipse
+    from OCC.Core.GProp import GProp_GProps
+    from OCC.Core.TopLoc import TopLoc_Location
     from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
-    from OCC.Core.StlAPI import StlAPI_Writer
-    from OCC.Core.gp import gp_Pnt
     HAS_PYTHONOCC = True
 except ImportError:
     HAS_PYTHONOCC = False
@@ -31,19 +48,257 @@ try:
 except ImportError:
     HAS_EZDXF = False
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from scipy.spatial import ConvexHull, QhullError, cKDTree
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+from geom_kernels import (compute_arc_centers, cluster_centers, dedup_points, find_boundary_edges,
+                          mesh_normal_sum, monotone_chain, points_in_polygon, project_flattest,
+                          trace_edge_path)
+
+# LOG_LEVEL applies to this module only; the root logger stays at WARNING so ezdxf's INFO output is kept quiet
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes NumPy arrays (mesh data is stored as ndarrays)"""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, (np.ndarray, np.generic)):
+            return o.tolist()
+        return DefaultJSONProvider.default(o)
+    
+    def dumps(self, obj, **kwargs):
+        if HAS_ORJSON and not kwargs:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.json = NumpyJSONProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024  # 16MB max file size by default
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024  # Copy uploads to disk in 1MB chunks
+STEP_MAGIC_PEEK_BYTES = 128  # STEP files start with "ISO-10303-21;"
+
+# OCC's STEP reader needs a real path. Uploads go to the normal temp dir unless UPLOAD_TMP_DIR opts in
+# to a tmpfs such as /dev/shm (size it for several queued uploads: Docker's default /dev/shm is only 64MB)
+UPLOAD_TMP_DIR = os.environ.get('UPLOAD_TMP_DIR') or None
+# With /proc/self/fd (Linux) the reader opens the upload through its still-open temp file,
+# which is deleted on close; elsewhere the temp file is closed, reopened by name and unlinked
+PROC_FD_DIR = '/proc/self/fd' if os.path.isdir('/proc/self/fd') else None
+
+# Behind a reverse proxy, hand cached exports off by path instead of streaming them through Python.
+# USE_X_SENDFILE=1 emits X-Sendfile (apache/lighttpd); EXPORT_ACCEL_PREFIX (e.g. /internal_files/)
+# emits nginx's X-Accel-Redirect for files under EXPORT_CACHE_DIR. Unset: Flask streams the file.
+# nginx: location /internal_files/ { internal; alias <EXPORT_CACHE_DIR>/; gzip_static on; }
+app.use_x_sendfile = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR') or None
+EXPORT_ACCEL_PREFIX = os.environ.get('EXPORT_ACCEL_PREFIX') or None
+if EXPORT_CACHE_DIR:
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+# The proxy opens handed-off files itself, usually as another user: exports are then group-readable
+# (put the proxy user in this process's group). EXPORT_CACHE_MODE overrides the file mode, e.g. 644
+PROXY_SERVES_EXPORTS = bool(app.use_x_sendfile or (EXPORT_ACCEL_PREFIX and EXPORT_CACHE_DIR))
+EXPORT_FILE_MODE = int(os.environ.get('EXPORT_CACHE_MODE') or ('640' if PROXY_SERVES_EXPORTS else '600'), 8)
+EXPORT_DIR_MODE = 0o700 | (EXPORT_FILE_MODE & 0o044) | (EXPORT_FILE_MODE & 0o044) >> 2  # r-x wherever files are readable
 
 # Add CORS headers
+CORS_HEADERS = (
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Headers', 'Content-Type,Authorization'),
+    ('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS'),
+)
+
 @app.after_request
 def after_request(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+    response.headers.extend(CORS_HEADERS)
     return response
 
+def json_bytes(payload):
+    """Encode payload as JSON bytes (orjson when available, NumPy arrays included)"""
+    if HAS_ORJSON:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return app.json.dumps(payload).encode('utf-8')
+
+def json_response(payload, status=200):
+    """Serialize payload as a JSON response"""
+    return app.response_class(json_bytes(payload), status=status, mimetype='application/json')
+
+# On-disk cache of meshed face data, keyed by SHA-256 of the uploaded STEP file
+MESH_CACHE_DIR = os.environ.get('MESH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'step_to_dxf_mesh_cache'))
+MESH_CACHE_MAX_ENTRIES = int(os.environ.get('MESH_CACHE_MAX_ENTRIES', 64))
+MESH_CACHE_MAX_BYTES = int(os.environ.get('MESH_CACHE_MAX_MB', 256)) * 1024 * 1024
+MESH_CACHE_VERSION = 4  # Bump when the face_data layout, meshing or cache file format changes
+
+def private_mesh_cache_dir():
+    """Return MESH_CACHE_DIR once it is verified to be a directory only this user can access, else None"""
+    try:
+        os.makedirs(MESH_CACHE_DIR, mode=0o700, exist_ok=True)
+        info = os.lstat(MESH_CACHE_DIR)
+    except OSError as e:
+        logger.warning("Mesh cache disabled: %s", e)
+        return None
+    # The default path is predictable, so refuse a directory (or symlink) someone else created first
+    owner_ok = not hasattr(os, 'getuid') or info.st_uid == os.getuid()
+    if not stat.S_ISDIR(info.st_mode) or not owner_ok or info.st_mode & 0o077:
+        logger.warning("Mesh cache disabled: %s is not a private directory owned by this user", MESH_CACHE_DIR)
+        return None
+    return MESH_CACHE_DIR
+
+# DXF previews and encoded face-info JSON kept per session (least recently used faces are rebuilt on demand)
+PREVIEW_CACHE_MAX_ENTRIES = int(os.environ.get('PREVIEW_CACHE_MAX_ENTRIES', 64))
+# PREVIEW_WARMUP=1 builds previews for the first faces in the background right after upload. Off by default:
+# the bundled viewer never requests previews, so only API clients of /api/preview-dxf* benefit
+PREVIEW_WARMUP = os.environ.get('PREVIEW_WARMUP', '').lower() in ('1', 'true', 'yes')
+# Most faces one /api/preview-dxf-batch request may ask for (a larger batch would evict its own previews)
+PREVIEW_BATCH_MAX_FACES = int(os.environ.get('PREVIEW_BATCH_MAX_FACES', PREVIEW_CACHE_MAX_ENTRIES))
+
+# STEP files load on a bounded pool instead of the request thread, so bursts of uploads queue up
+LOAD_WORKERS = int(os.environ.get('LOAD_WORKERS', max(2, (os.cpu_count() or 1) - 1)))
+# Uploads loading or waiting to load at once; further uploads get a 503 instead of queueing without bound
+LOAD_QUEUE_MAX = int(os.environ.get('LOAD_QUEUE_MAX', 4 * LOAD_WORKERS))
+
+# メッシュSVGの三角形1つ分の書式 (%-演算でまとめて整形する)
+SVG_POLYGON_FORMAT = '  <polygon points="%.3f,%.3f %.3f,%.3f %.3f,%.3f" class="face"/>\n'
+
+# create_guaranteed_dxf の面ラベル用プレースホルダ (キャッシュ済みDXFバイト列内で置換する)
+GUARANTEED_DXF_LABEL = '__FACE_LABEL__'
+
+# Session store bounds: least recently used sessions beyond the cap, or idle past the TTL, are dropped
+SESSION_MAX_ENTRIES = int(os.environ.get('SESSION_MAX_ENTRIES', 32))
+SESSION_TTL_SECONDS = float(os.environ.get('SESSION_TTL_SECONDS', 3600))
+
+class SessionLRU:
+    """Bounded least-recently-used session store that removes the export cache of evicted sessions"""
+    
+    def __init__(self, capacity, ttl=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()  # session_id -> (last access time, session dict), oldest first
+        self._lock = threading.RLock()
+    
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+    
+    def __getitem__(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+    
+    def get(self, session_id):
+        """Return the session and mark it as recently used, or None if it is unknown or expired"""
+        with self._lock:
+            evicted = self._expire()
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries[session_id] = (time.monotonic(), entry[1])
+                self._entries.move_to_end(session_id)
+        self._close_all(evicted)
+        return None if entry is None else entry[1]
+    
+    def __setitem__(self, session_id, session):
+        with self._lock:
+            self._entries[session_id] = (time.monotonic(), session)
+            self._entries.move_to_end(session_id)
+            evicted = self._expire()
+            while len(self._entries) > self.capacity:
+                _, (_, session) = self._entries.popitem(last=False)
+                evicted.append(session)
+        self._close_all(evicted)
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def _expire(self):
+        """Unlink sessions idle for longer than the TTL and return them (entries are kept in access order)"""
+        expired = []
+        if not self.ttl:
+            return expired
+        cutoff = time.monotonic() - self.ttl
+        while self._entries:
+            session_id, (last_access, session) = next(iter(self._entries.items()))
+            if last_access >= cutoff:
+                break
+            del self._entries[session_id]
+            expired.append(session)
+        return expired
+    
+    @staticmethod
+    def _close_all(evicted):
+        # Runs outside the lock so removing cache directories never blocks lookups; the processor itself is
+        # left to the garbage collector, since requests that snapshotted the session may still be using it.
+        # A load that has not started is cancelled; one already running is cleaned up once it finishes
+        for session in evicted:
+            session['job'].cancel()
+            session['job'].add_done_callback(
+                lambda job, cache_dir=session['cache_dir']: shutil.rmtree(cache_dir, ignore_errors=True))
+
+# Session IDs are str(uuid.uuid4()); anything else is rejected before the store (and its lock) is touched
+SESSION_ID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$')
+
 # Global storage for current session data
-sessions = {}
+sessions = SessionLRU(SESSION_MAX_ENTRIES, SESSION_TTL_SECONDS)
+
+def mesh_arrays(vertices, triangles):
+    """Build a mesh dict holding contiguous float64 vertices and int32 triangles"""
+    return {
+        'vertices': np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3),
+        'triangles': np.ascontiguousarray(triangles, dtype=np.int32).reshape(-1, 3)
+    }
+
+def dxf_to_bytes(doc):
+    """Serialize an ezdxf document to DXF file bytes in memory"""
+    stream = io.StringIO()
+    doc.write(stream)
+    return doc.encode(stream.getvalue())
+
+def write_file_atomic(path, data, mode=0o600):
+    """Write bytes next to path and rename, so concurrent readers never see a partial file"""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as temp_file:
+        os.chmod(temp_file.name, mode)
+        temp_file.write(data)
+    os.replace(temp_file.name, path)
+
+def trsf_to_numpy(trsf):
+    """Convert a gp_Trsf into a (3, 4) NumPy matrix [R | t]"""
+    return np.array([[trsf.Value(row, col) for col in range(1, 5)] for row in range(1, 4)], dtype=np.float64)
+
+def is_arc_ccw(start, end, mid):
+    """反時計回りで mid が start と end の間にあるかチェック (中心からの相対ベクトル、配列可)"""
+    start, end, mid = np.asarray(start), np.asarray(end), np.asarray(mid)
+    
+    # 外積の符号で向きを判定 (三角関数は不要)
+    cross_se = start[..., 0] * end[..., 1] - start[..., 1] * end[..., 0]
+    cross_sm = start[..., 0] * mid[..., 1] - start[..., 1] * mid[..., 0]
+    cross_me = mid[..., 0] * end[..., 1] - mid[..., 1] * end[..., 0]
+    
+    # start -> end が180°以内: mid は両側の間 / 180°超: どちらか一方の側にあればよい
+    return np.where(cross_se >= 0,
+                    (cross_sm >= 0) & (cross_me >= 0),
+                    (cross_sm >= 0) | (cross_me >= 0))
+
+class FaceProjector:
+    """Projects 3D points onto a face plane with a precomputed (2, 3) basis"""
+    __slots__ = ('basis',)
+    
+    def __init__(self, basis):
+        self.basis = basis
+    
+    def project(self, points):
+        """(N, 3) の点群を一括投影し、(N, 2) の配列を返す"""
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        return pts @ self.basis.T
 
 class STEPProcessor:
     """STEP file processing class"""
@@ -52,6 +307,13 @@ class STEPProcessor:
         self.step_shape = None
         self.faces = []
         self.face_data = []
+        self._projectors = {}  # face_id -> FaceProjector
+        self._normal_cache = {}  # face_id -> surface normal from OCC
+        self._face_cache = {}  # face_id -> (svg_elements, all_points) from STEP edges
+        self._preview_cache = OrderedDict()  # face_id -> DXF preview data, least recently used first
+        self._preview_lock = threading.Lock()  # Guards the preview and face-info caches
+        self._preview_pending = {}  # face_id -> Future of a preview currently being built
+        self._face_info_cache = OrderedDict()  # face_id -> encoded face-info JSON, least recently used first
     
     def load_step_file(self, file_path):
         """Load STEP file and extract faces"""
@@ -69,8 +331,19 @@ class STEPProcessor:
             step_reader.TransferRoots()
             self.step_shape = step_reader.OneShape()
             
-            # Extract faces
-            self.extract_faces()
+            # Reuse meshed face data from an earlier upload of the same file
+            digest = self.file_digest(file_path)
+            cached_face_data = self.load_cached_face_data(digest)
+            if cached_face_data is not None and self.collect_faces() == len(cached_face_data):
+                logger.debug("Using cached face data for %s", digest[:12])
+                self.face_data = cached_face_data
+            else:
+                # Extract faces
+                self.extract_faces()
+                self.store_cached_face_data(digest)
+            
+            # Previews run on worker threads; seed the normals so they never have to query OCC
+            self._normal_cache = {face['id']: face['normal'] for face in self.face_data}
             
             return {
                 'success': True,
@@ -81,60 +354,142 @@ class STEPProcessor:
         except Exception as e:
             raise Exception(f"Error processing STEP file: {str(e)}")
     
+    def file_digest(self, file_path):
+        """SHA-256 of the STEP file contents (plus cache version) used as mesh cache key"""
+        digest = hashlib.sha256(f"v{MESH_CACHE_VERSION}:".encode())
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def load_cached_face_data(self, digest):
+        """Load face data saved by a previous upload, or None on cache miss"""
+        cache_dir = private_mesh_cache_dir()
+        if cache_dir is None:
+            return None
+        cache_path = os.path.join(cache_dir, f"{digest}.npz")
+        try:
+            # Plain arrays only (allow_pickle=False): a cache file can never execute code
+            with np.load(cache_path, allow_pickle=False) as arrays:
+                face_data = [
+                    {
+                        'id': int(face_id),
+                        'type': str(face_type),
+                        'is_plane': bool(is_plane),
+                        'mesh': mesh_arrays(arrays[f'vertices_{index}'], arrays[f'triangles_{index}']),
+                        'normal': normal.tolist()
+                    }
+                    for index, (face_id, face_type, is_plane, normal) in enumerate(zip(
+                        arrays['ids'], arrays['types'], arrays['is_plane'], arrays['normals']))
+                ]
+            os.utime(cache_path)  # Mark as recently used for eviction
+            return face_data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Corrupt, truncated or stale entries are a cache miss; drop them so they are rebuilt
+            logger.warning("Discarding unreadable mesh cache entry %s: %s", digest[:12], e)
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+            return None
+    
+    def store_cached_face_data(self, digest):
+        """Persist face data for reuse and evict least recently used entries"""
+        cache_dir = private_mesh_cache_dir()
+        if cache_dir is None:
+            return
+        try:
+            arrays = {
+                'ids': np.array([face['id'] for face in self.face_data], dtype=np.int64),
+                'types': np.array([face['type'] for face in self.face_data], dtype=np.str_),
+                'is_plane': np.array([face['is_plane'] for face in self.face_data], dtype=np.bool_),
+                'normals': np.array([face['normal'] for face in self.face_data], dtype=np.float64).reshape(-1, 3)
+            }
+            for index, face in enumerate(self.face_data):
+                arrays[f'vertices_{index}'] = face['mesh']['vertices']
+                arrays[f'triangles_{index}'] = face['mesh']['triangles']
+            
+            cache_path = os.path.join(cache_dir, f"{digest}.npz")
+            temp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, 'wb') as file:
+                np.savez_compressed(file, **arrays)
+            os.replace(temp_path, cache_path)
+            
+            # Keep the most recently used entries that fit both the entry and the byte limit
+            entries = []
+            for name in os.listdir(cache_dir):
+                if name.endswith('.npz'):
+                    info = os.stat(os.path.join(cache_dir, name))
+                    entries.append((info.st_mtime, info.st_size, name))
+            entries.sort(reverse=True)
+            total_bytes = 0
+            for count, (_, size, name) in enumerate(entries):
+                total_bytes += size
+                if count >= MESH_CACHE_MAX_ENTRIES or total_bytes > MESH_CACHE_MAX_BYTES:
+                    os.remove(os.path.join(cache_dir, name))
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to write mesh cache: %s", e)
+    
+    def collect_faces(self):
+        """Collect faces of the loaded shape without meshing them"""
+        self.faces = []
+        self._projectors = {}
+        self._normal_cache = {}
+        self._face_cache = {}
+        self._preview_cache = OrderedDict()
+        self._preview_pending = {}
+        self._face_info_cache = OrderedDict()
+        
+        explorer = TopExp_Explorer(self.step_shape, TopAbs_FACE)
+        while explorer.More():
+            self.faces.append(explorer.Current())
+            explorer.Next()
+        
+        return len(self.faces)
+    
     def parse_step_file_manually(self, file_path):
         """Manually parse STEP file for basic geometry extraction"""
         try:
-            with open(file_path, 'r') as file:
-                content = file.read()
-            
-            # Basic STEP parsing - look for geometric entities
-            lines = content.split('\n')
-            faces_found = 0
-            circles_found = 0
-            lines_found = 0
-            
-            for line in lines:
-                line = line.strip()
-                if 'FACE' in line.upper():
-                    faces_found += 1
-                elif 'CIRCLE' in line.upper():
-                    circles_found += 1
-                elif 'LINE' in line.upper():
-                    lines_found += 1
-            
+            with open(file_path, 'rb') as file:
+                data = file.read()
+
+            # Basic STEP parsing - count geometric entities with C-level byte scans
+            data_upper = data.upper()
+            faces_found = data_upper.count(b'FACE')
+            circles_found = data_upper.count(b'CIRCLE')
+            lines_found = data_upper.count(b'LINE')
+
             # Create mock face data for demonstration
             self.faces = []
             self.face_data = []
+            self._projectors = {}
+            self._normal_cache = {}
+            self._face_cache = {}
+            self._preview_cache = OrderedDict()
+            self._preview_pending = {}
+            self._face_info_cache = OrderedDict()
             
             # Generate some basic geometric shapes for testing
             face_count = max(faces_found, 3)  # At least 3 faces for demo
             
-            for i in range(face_count):
-                # Create basic rectangular face data
-                vertices = [
-                    [-10 + i*5, -10 + i*5, 0],
-                    [10 + i*5, -10 + i*5, 0],
-                    [10 + i*5, 10 + i*5, 0],
-                    [-10 + i*5, 10 + i*5, 0]
-                ]
-                
-                triangles = [
-                    [0, 1, 2],
-                    [0, 2, 3]
-                ]
-                
-                face_info = {
+            # Create basic rectangular face data: one base square shifted diagonally per face
+            base = np.array([[-10, -10], [10, -10], [10, 10], [-10, 10]])
+            offsets = np.arange(face_count) * 5
+            xy = base[None, :, :] + offsets[:, None, None]
+            face_vertices = np.concatenate([xy, np.zeros((face_count, 4, 1), dtype=xy.dtype)], axis=2)
+            
+            self.face_data = [
+                {
                     'id': i,
                     'type': 'Plane',
                     'is_plane': True,
-                    'mesh': {
-                        'vertices': vertices,
-                        'triangles': triangles
-                    }
+                    'mesh': mesh_arrays(vertices, [[0, 1, 2], [0, 2, 3]])
                 }
-                
-                self.face_data.append(face_info)
-                self.faces.append(f"mock_face_{i}")
+                for i, vertices in enumerate(face_vertices)
+            ]
+            self.faces = [f"mock_face_{i}" for i in range(face_count)]
             
             return {
                 'success': True,
@@ -154,7 +509,7 @@ class STEPProcessor:
         if face_id >= len(self.face_data):
             raise Exception("Invalid face ID")
         
-        print(f"Creating DXF for face {face_id}")
+        logger.debug("Creating DXF for face %s", face_id)
         return self.create_new_dxf(face_id)
     
     def export_face_to_svg(self, face_id):
@@ -162,92 +517,147 @@ class STEPProcessor:
         if face_id >= len(self.face_data):
             raise Exception("Invalid face ID")
         
-        print(f"Creating SVG for face {face_id}")
+        logger.debug("Creating SVG for face %s", face_id)
         return self.create_svg(face_id)
     
     def extract_faces(self):
         """Extract faces from STEP shape"""
-        self.faces = []
         self.face_data = []
+        self.collect_faces()
         
-        # First create mesh for entire shape
-        shape_mesh = BRepMesh_IncrementalMesh(self.step_shape, 0.1, False, 0.5, True)
-        shape_mesh.Perform()
+        # Faces are analysed serially: OCCT makes no thread-safety guarantee for concurrent reads and
+        # meshing of one shape. Classify every face first so the shape is only meshed when some face needs it
+        classes = [self._classify_face(face) for face in self.faces]
         
-        explorer = TopExp_Explorer(self.step_shape, TopAbs_FACE)
-        face_index = 0
+        # Create mesh for entire shape unless every face is a simple planar polygon
+        if any(outline is None for _, _, outline in classes):
+            shape_mesh = BRepMesh_IncrementalMesh(self.step_shape, 0.1, False, 0.5, True)
+            shape_mesh.Perform()
         
-        while explorer.More():
-            face = explorer.Current()
-            self.faces.append(face)
-            
-            # Analyze face properties
-            try:
-                adaptor = BRepAdaptor_Surface(face)
-                surface_type = adaptor.GetType()
-                is_plane = surface_type == GeomAbs_Plane
-                face_type = "Plane" if is_plane else "Curved"
-            except:
-                face_type = "Unknown"
-                is_plane = False
-            
-            # Get face geometry for visualization
-            mesh_data = self.get_face_mesh(face, face_index)
+        self.face_data = [self._analyze_face(face_index, *face_class) for face_index, face_class in enumerate(classes)]
+    
+    def _classify_face(self, face):
+        """Return (face_type, is_plane, planar outline or None) for a face"""
+        try:
+            adaptor = BRepAdaptor_Surface(face)
+            surface_type = adaptor.GetType()
+            is_plane = surface_type == GeomAbs_Plane
+            face_type = "Plane" if is_plane else "Curved"
+        except:
+            face_type = "Unknown"
+            is_plane = False
+        
+        outline = self.get_planar_outline(face) if is_plane else None
+        return face_type, is_plane, outline
+    
+    def _analyze_face(self, face_index, face_type, is_plane, outline):
+        """Build the face_info dict (mesh and normal) for a classified face"""
+        face = self.faces[face_index]
+        
+        # Get face geometry for visualization
+        mesh_data = self.get_face_mesh(face, face_index, outline)
+        
+        # Get face normal for camera positioning
+        try:
+            normal = self.get_face_normal(face_index)
+        except:
+            normal = [0, 0, 1]  # Default normal if calculation fails
+        
+        return {
+            'id': face_index,
+            'type': face_type,
+            'is_plane': is_plane,
+            'mesh': mesh_data,
+            'normal': normal
+        }
+    
+    def get_planar_outline(self, face):
+        """Return the outer wire vertices of a convex planar face bounded only by lines, else None"""
+        try:
+            wires = []
+            wire_explorer = TopExp_Explorer(face, TopAbs_WIRE)
+            while wire_explorer.More() and len(wires) < 2:
+                wires.append(wire_explorer.Current())
+                wire_explorer.Next()
             
-            # Get face normal for camera positioning
-            try:
-                normal = self.get_face_normal(face_index)
-            except:
-                normal = [0, 0, 1]  # Default normal if calculation fails
-            
-            face_info = {
-                'id': face_index,
-                'type': face_type,
-                'is_plane': is_plane,
-                'mesh': mesh_data,
-                'normal': normal
-            }
+            # Faces with holes need a real triangulation
+            if len(wires) != 1:
+                return None
             
-            self.face_data.append(face_info)
-            face_index += 1
-            explorer.Next()
+            vertices = []
+            edge_explorer = BRepTools_WireExplorer(wires[0])
+            while edge_explorer.More():
+                if BRepAdaptor_Curve(edge_explorer.Current()).GetType() != GeomAbs_Line:
+                    return None
+                pnt = BRep_Tool.Pnt(edge_explorer.CurrentVertex())
+                vertices.append((pnt.X(), pnt.Y(), pnt.Z()))
+                edge_explorer.Next()
+            
+            if len(vertices) < 3:
+                return None
+            
+            # A triangle fan is only valid when every corner turns the same way
+            outline = np.array(vertices, dtype=np.float64)
+            edges = np.roll(outline, -1, axis=0) - outline
+            turns = np.cross(edges, np.roll(edges, -1, axis=0))
+            if np.any(turns @ turns.sum(axis=0) < -1e-9):
+                return None
+            
+            return outline
+        except Exception:
+            return None
     
-    def get_face_mesh(self, face, face_id):
+    def get_face_mesh(self, face, face_id, outline=None):
         """Get mesh data for face visualization"""
         try:
-            from OCC.Core.TopLoc import TopLoc_Location
-            from OCC.Core.BRep import BRep_Tool
-            from OCC.Core.Poly import Poly_Triangulation
-            
-            # Create high-quality mesh
-            mesh = BRepMesh_IncrementalMesh(face, 0.1, False, 0.5, True)
-            mesh.Perform()
+            # Convex planar faces are drawn as a fan over their outline without meshing
+            if outline is not None:
+                fan = np.arange(1, len(outline) - 1)
+                return mesh_arrays(outline, np.column_stack((np.zeros_like(fan), fan, fan + 1)))
             
             # Get triangulation from the face
             location = TopLoc_Location()
             triangulation = BRep_Tool.Triangulation(face, location)
             
+            # Create high-quality mesh only if the whole-shape pass left none (meshing again
+            # with the same parameters would be a no-op for faces that are already meshed)
+            if not triangulation:
+                mesh = BRepMesh_IncrementalMesh(face, 0.1, False, 0.5, True)
+                mesh.Perform()
+                triangulation = BRep_Tool.Triangulation(face, location)
+            
             vertices = []
             triangles = []
             
             if triangulation:
-                # Extract vertices
-                for i in range(1, triangulation.NbNodes() + 1):
-                    pnt = triangulation.Node(i)
-                    # Apply transformation if needed
-                    if not location.IsIdentity():
-                        pnt = pnt.Transformed(location.Transformation())
-                    vertices.append([pnt.X(), pnt.Y(), pnt.Z()])
+                # Write nodes straight into a preallocated array (bound methods avoid per-node attribute lookups)
+                node_count = triangulation.NbNodes()
+                nodes = np.empty((node_count, 3), dtype=np.float64)
+                node = triangulation.Node
+                for i in range(node_count):
+                    pnt = node(i + 1)
+                    nodes[i, 0] = pnt.X()
+                    nodes[i, 1] = pnt.Y()
+                    nodes[i, 2] = pnt.Z()
                 
-                # Extract triangles (convert from 1-based to 0-based indexing)
-                for i in range(1, triangulation.NbTriangles() + 1):
-                    triangle = triangulation.Triangle(i)
-                    n1, n2, n3 = triangle.Get()
-                    triangles.append([n1-1, n2-1, n3-1])
-            
+                # Apply the location transform to all nodes with one matrix product
+                if not location.IsIdentity():
+                    matrix = trsf_to_numpy(location.Transformation())
+                    nodes = nodes @ matrix[:, :3].T + matrix[:, 3]
+
+                # Extract triangles into a preallocated array and convert from 1-based to 0-based indexing in one step
+                triangle_count = triangulation.NbTriangles()
+                tris = np.empty((triangle_count, 3), dtype=np.int32)
+                triangle = triangulation.Triangle
+                for i in range(triangle_count):
+                    tris[i] = triangle(i + 1).Get()
+                tris -= 1
+
+                vertices = nodes
+                triangles = tris
+
             # Fallback: if no triangulation, create simple representation
-            if not vertices:
-                from OCC.Core.GProp import GProp_GProps
+            if not len(vertices):
                 from OCC.Core.BRepGProp import brepgprop_SurfaceProperties
                 
                 props = GProp_GProps()
@@ -277,31 +687,29 @@ class STEPProcessor:
                     [0, 2, 3]
                 ]
             
-            return {
-                'vertices': vertices,
-                'triangles': triangles
-            }
+            return mesh_arrays(vertices, triangles)
             
         except Exception as e:
             # Fallback: create a default square
-            return {
-                'vertices': [
+            mesh = mesh_arrays(
+                [
                     [-10, -10, 0],
                     [10, -10, 0],
                     [10, 10, 0],
                     [-10, 10, 0]
                 ],
-                'triangles': [
+                [
                     [0, 1, 2],
                     [0, 2, 3]
-                ],
-                'center': [0, 0, 0]
-            }
+                ]
+            )
+            mesh['center'] = [0, 0, 0]
+            return mesh
     
     
     def create_new_dxf(self, face_id):
         """Create DXF from actual face edges (not point cloud)"""
-        print(f"Creating DXF from face edges for face {face_id}")
+        logger.debug("Creating DXF from face edges for face %s", face_id)
         
         # Create DXF document
         doc = ezdxf.new('R2010')
@@ -313,7 +721,7 @@ class STEPProcessor:
             try:
                 return self.create_dxf_from_step_edges(face_id, doc, msp)
             except Exception as e:
-                print(f"STEP edge extraction failed: {e}")
+                logger.warning("STEP edge extraction failed: %s", e)
                 # Fall back to mesh approach
         
         # Fallback: use improved mesh analysis
@@ -321,213 +729,223 @@ class STEPProcessor:
     
     def create_svg(self, face_id):
         """Create SVG from face geometry"""
-        print(f"Creating SVG from face geometry for face {face_id}")
+        logger.debug("Creating SVG from face geometry for face %s", face_id)
         
         # Try to use actual STEP geometry if available
         if HAS_PYTHONOCC and hasattr(self, 'step_shape') and self.step_shape and face_id < len(self.faces):
             try:
                 return self.create_svg_from_step_edges(face_id)
             except Exception as e:
-                print(f"STEP edge extraction for SVG failed: {e}")
+                logger.warning("STEP edge extraction for SVG failed: %s", e)
                 # Fall back to mesh approach
         
         # Fallback: use mesh analysis
         return self.create_svg_from_mesh(face_id)
     
-    def create_svg_from_step_edges(self, face_id):
-        """Extract actual edges from STEP face and convert to SVG"""
-        print(f"Extracting STEP edges for SVG for face {face_id}")
+    def get_svg_edge_elements(self, face_id):
+        """Collect SVG elements and bounding-box points from STEP face edges (cached per face)"""
+        cached = self._face_cache.get(face_id)
+        if cached is not None:
+            logger.debug("Using cached STEP edges for face %s", face_id)
+            return cached
+        
+        face = self.faces[face_id]
+        
+        # Store all geometry elements for SVG
+        svg_elements = []
+        all_points = []  # For bounding box calculation
+        
+        # Single pass: collect all wires together with their lengths to determine boundary
+        # (legacy brepgprop_* free functions stay a local import: newer pythonocc drops them)
+        from OCC.Core.BRepGProp import brepgprop_LinearProperties
+        
+        wires = []
+        wire_lengths = []
+        wire_explorer = TopExp_Explorer(face, TopAbs_WIRE)
+        while wire_explorer.More():
+            wire = wire_explorer.Current()
+            try:
+                props = GProp_GProps()
+                brepgprop_LinearProperties(wire, props)
+                length = props.Mass()  # Wire length
+                logger.debug("Wire %d length: %.2f", len(wires) + 1, length)
+            except:
+                length = 0
+            wires.append(wire)
+            wire_lengths.append(length)
+            wire_explorer.Next()
         
-        try:
-            from OCC.Core.TopExp import TopExp_Explorer
-            from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_WIRE
-            from OCC.Core.BRep import BRep_Tool
-            from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
-            from OCC.Core.GeomAbs import GeomAbs_Line, GeomAbs_Circle, GeomAbs_Ellipse, GeomAbs_BSplineCurve
-            from OCC.Core.BRepTools import BRepTools_WireExplorer
-            import math
-            
-            face = self.faces[face_id]
-            
-            # Store all geometry elements for SVG
-            svg_elements = []
-            all_points = []  # For bounding box calculation
-            
-            # First pass: collect all wires and calculate their areas to determine boundary
-            from OCC.Core.GProp import GProp_GProps
-            from OCC.Core.BRepGProp import brepgprop_LinearProperties
-            
-            wires = []
-            wire_explorer = TopExp_Explorer(face, TopAbs_WIRE)
-            while wire_explorer.More():
-                wire = wire_explorer.Current()
-                wires.append(wire)
-                wire_explorer.Next()
+        logger.debug("Found %s wires for SVG", len(wires))
+        
+        # Largest wire (by perimeter) is usually the boundary
+        boundary_wire_idx = int(np.argmax(wire_lengths))
+        logger.debug("Wire %s identified as boundary", boundary_wire_idx+1)
+        
+        # Every edge only records its 3D samples during the walk; all samples are
+        # projected in a single batch afterwards and spliced back by offset
+        sample_pts = []
+        pending = []  # (type, class, radius, offset, count) into sample_pts
+        
+        def add_samples(points):
+            offset = len(sample_pts)
+            sample_pts.extend([p.X(), p.Y(), p.Z()] for p in points)
+            return offset
+        
+        # Loop-invariant lookups bound once for the edge walk
+        add_pending = pending.append
+        edge_curve = BRep_Tool.Curve
+        
+        # Second pass: process wires with correct classification
+        for wire_idx, wire in enumerate(wires):
+            class_name = 'boundary' if wire_idx == boundary_wire_idx else 'hole'
+            logger.debug("Processing SVG wire %d - class: %s", wire_idx + 1, class_name)
             
-            print(f"Found {len(wires)} wires for SVG")
+            # Process each edge in the wire
+            edge_explorer = BRepTools_WireExplorer(wire)
             
-            # Determine which wire is the boundary (largest area/perimeter)
-            wire_lengths = []
-            for i, wire in enumerate(wires):
-                try:
-                    props = GProp_GProps()
-                    brepgprop_LinearProperties(wire, props)
-                    length = props.Mass()  # Wire length
-                    wire_lengths.append((length, i))
-                    print(f"Wire {i+1} length: {length:.2f}")
-                except:
-                    wire_lengths.append((0, i))
-            
-            # Sort by length descending - largest wire is usually the boundary
-            wire_lengths.sort(reverse=True)
-            boundary_wire_idx = wire_lengths[0][1]
-            print(f"Wire {boundary_wire_idx+1} identified as boundary")
-            
-            # Second pass: process wires with correct classification
-            for wire_idx, wire in enumerate(wires):
-                class_name = 'boundary' if wire_idx == boundary_wire_idx else 'hole'
-                print(f"Processing SVG wire {wire_idx+1} - class: {class_name}")
+            while edge_explorer.More():
+                edge = edge_explorer.Current()
                 
-                # Process each edge in the wire
-                edge_explorer = BRepTools_WireExplorer(wire)
-                
-                while edge_explorer.More():
-                    edge = edge_explorer.Current()
-                    
-                    try:
-                        # Get curve from edge
-                        curve, first, last = BRep_Tool.Curve(edge)
-                        if curve:
-                            # Analyze curve type
-                            adaptor = BRepAdaptor_Curve(edge)
-                            curve_type = adaptor.GetType()
+                try:
+                    # Get curve from edge
+                    curve, first, last = edge_curve(edge)
+                    if curve:
+                        # Analyze curve type
+                        adaptor = BRepAdaptor_Curve(edge)
+                        curve_type = adaptor.GetType()
+                        curve_value = curve.Value
+                        
+                        if curve_type == GeomAbs_Line:
+                            # Line
+                            offset = add_samples([curve_value(first), curve_value(last)])
+                            add_pending(('line', class_name, None, offset, 2))
                             
-                            if curve_type == GeomAbs_Line:
-                                # Line
-                                p1 = curve.Value(first)
-                                p2 = curve.Value(last)
-                                p1_2d = self.simple_project_to_2d([[p1.X(), p1.Y(), p1.Z()]], face_id)[0]
-                                p2_2d = self.simple_project_to_2d([[p2.X(), p2.Y(), p2.Z()]], face_id)[0]
-                                
-                                svg_elements.append({
-                                    'type': 'line',
-                                    'class': class_name,
-                                    'x1': p1_2d[0], 'y1': p1_2d[1],
-                                    'x2': p2_2d[0], 'y2': p2_2d[1]
-                                })
-                                all_points.extend([p1_2d, p2_2d])
-                                print(f"  Added SVG LINE: ({p1_2d[0]:.2f},{p1_2d[1]:.2f}) to ({p2_2d[0]:.2f},{p2_2d[1]:.2f}) - class: {class_name}")
-                                
-                            elif curve_type == GeomAbs_Circle:
-                                # Circle/Arc
-                                circle = adaptor.Circle()
-                                center = circle.Location()
-                                radius = circle.Radius()
-                                center_2d = self.simple_project_to_2d([[center.X(), center.Y(), center.Z()]], face_id)[0]
-                                
-                                # Check if it's a full circle or arc
-                                param_range = abs(last - first)
-                                is_full_circle = abs(param_range - 2 * math.pi) < 0.01
-                                
-                                if is_full_circle:
-                                    svg_elements.append({
-                                        'type': 'circle',
-                                        'class': class_name,
-                                        'cx': center_2d[0], 'cy': center_2d[1],
-                                        'r': radius
-                                    })
-                                    # Add circle bounds to points
-                                    all_points.extend([
-                                        [center_2d[0] - radius, center_2d[1] - radius],
-                                        [center_2d[0] + radius, center_2d[1] + radius]
-                                    ])
-                                    print(f"  Added SVG CIRCLE: center=({center_2d[0]:.2f},{center_2d[1]:.2f}), radius={radius:.2f} - class: {class_name}")
-                                else:
-                                    # Arc - use same logic as DXF for correct direction
-                                    start_point = curve.Value(first)
-                                    end_point = curve.Value(last)
-                                    start_2d = self.simple_project_to_2d([[start_point.X(), start_point.Y(), start_point.Z()]], face_id)[0]
-                                    end_2d = self.simple_project_to_2d([[end_point.X(), end_point.Y(), end_point.Z()]], face_id)[0]
-                                    
-                                    # Calculate angles relative to center in 2D space
-                                    start_angle_rad = math.atan2(start_2d[1] - center_2d[1], start_2d[0] - center_2d[0])
-                                    end_angle_rad = math.atan2(end_2d[1] - center_2d[1], end_2d[0] - center_2d[0])
-                                    
-                                    # Convert to degrees
-                                    start_angle_deg = math.degrees(start_angle_rad) % 360
-                                    end_angle_deg = math.degrees(end_angle_rad) % 360
-                                    
-                                    # Sample middle point to determine actual arc direction
-                                    mid_param = (first + last) / 2
-                                    mid_point = curve.Value(mid_param)
-                                    mid_2d = self.simple_project_to_2d([[mid_point.X(), mid_point.Y(), mid_point.Z()]], face_id)[0]
-                                    mid_angle_rad = math.atan2(mid_2d[1] - center_2d[1], mid_2d[0] - center_2d[0])
-                                    mid_angle_deg = math.degrees(mid_angle_rad) % 360
-                                    
-                                    # Check if middle point is between start and end in CCW direction
-                                    def is_angle_between_ccw(start, end, mid):
-                                        """Check if mid is between start and end in counter-clockwise direction"""
-                                        start, end, mid = start % 360, end % 360, mid % 360
-                                        if start <= end:
-                                            return start <= mid <= end
-                                        else:
-                                            return mid >= start or mid <= end
-                                    
-                                    is_ccw = is_angle_between_ccw(start_angle_deg, end_angle_deg, mid_angle_deg)
-                                    
-                                    # Calculate angle difference to determine if it's a large arc
-                                    if is_ccw:
-                                        angle_diff = (end_angle_deg - start_angle_deg) % 360
-                                    else:
-                                        angle_diff = (start_angle_deg - end_angle_deg) % 360
-                                    
-                                    # For SVG: large-arc-flag = 1 if angle > 180°, sweep-flag = 1 for CCW
-                                    large_arc = 1 if angle_diff > 180 else 0
-                                    sweep_flag = 1 if is_ccw else 0
-                                    
-                                    svg_elements.append({
-                                        'type': 'arc',
-                                        'class': class_name,
-                                        'start_x': start_2d[0], 'start_y': start_2d[1],
-                                        'end_x': end_2d[0], 'end_y': end_2d[1],
-                                        'radius': radius,
-                                        'large_arc': large_arc,
-                                        'sweep_flag': sweep_flag
-                                    })
-                                    all_points.extend([start_2d, end_2d])
-                                    print(f"  Added SVG ARC: start=({start_2d[0]:.2f},{start_2d[1]:.2f}) end=({end_2d[0]:.2f},{end_2d[1]:.2f}) radius={radius:.2f} angle_diff={angle_diff:.1f}° ccw={is_ccw} large={large_arc} sweep={sweep_flag} - class: {class_name}")
+                        elif curve_type == GeomAbs_Circle:
+                            # Circle/Arc
+                            circle = adaptor.Circle()
+                            center = circle.Location()
+                            radius = circle.Radius()
+                            
+                            # Check if it's a full circle or arc
+                            param_range = abs(last - first)
+                            is_full_circle = abs(param_range - 2 * math.pi) < 0.01
                             
+                            if is_full_circle:
+                                offset = add_samples([center])
+                                add_pending(('circle', class_name, radius, offset, 1))
                             else:
-                                # Other curve types - discretize
-                                points = []
-                                num_points = 20
-                                for i in range(num_points + 1):
-                                    param = first + (last - first) * i / num_points
-                                    point = curve.Value(param)
-                                    point_2d = self.simple_project_to_2d([[point.X(), point.Y(), point.Z()]], face_id)[0]
-                                    points.append(point_2d)
-                                
-                                if len(points) > 1:
-                                    svg_elements.append({
-                                        'type': 'polyline',
-                                        'class': class_name,
-                                        'points': points
-                                    })
-                                    all_points.extend(points)
-                    
-                    except Exception as e:
-                        print(f"Error processing edge: {e}")
-                    
-                    edge_explorer.Next()
+                                # Arc - center, start, mid and end are resolved in one batch later
+                                offset = add_samples([center, curve_value(first),
+                                                      curve_value((first + last) / 2), curve_value(last)])
+                                add_pending(('arc', class_name, radius, offset, 4))
+                        
+                        else:
+                            # Other curve types - discretize over evenly spaced parameters
+                            num_points = 20
+                            params = np.linspace(first, last, num_points + 1).tolist()
+                            offset = add_samples(map(curve_value, params))
+                            add_pending(('polyline', class_name, None, offset, num_points + 1))
+                
+                except Exception as e:
+                    logger.warning("Error processing edge: %s", e)
+                
+                edge_explorer.Next()
+        
+        # Project every sample of the face at once
+        pts_2d = self._get_projector(face_id).project(sample_pts)
+        pts_list = pts_2d.tolist()
+        
+        # Resolve all arcs at once: compute start/mid/end angles vectorized
+        arc_offsets = [offset for kind, _, _, offset, _ in pending if kind == 'arc']
+        arc_flags = iter(())
+        if arc_offsets:
+            arc_2d = pts_2d[np.asarray(arc_offsets)[:, None] + np.arange(4)]
+            
+            # Start/mid/end relative to the center; only start and end need angles, in degrees [0, 360)
+            rel = arc_2d[:, 1:, :] - arc_2d[:, :1, :]
+            angles = np.degrees(np.arctan2(rel[:, ::2, 1], rel[:, ::2, 0])) % 360
+            start_deg, end_deg = angles[:, 0], angles[:, 1]
+            
+            # Middle point between start and end in CCW direction means a CCW arc
+            is_ccw = is_arc_ccw(rel[:, 0], rel[:, 2], rel[:, 1])
+            angle_diff = np.where(is_ccw, end_deg - start_deg, start_deg - end_deg) % 360
+            
+            # For SVG: large-arc-flag = 1 if angle > 180°, sweep-flag = 1 for CCW
+            arc_flags = zip(angle_diff.tolist(), (angle_diff > 180).astype(int).tolist(),
+                            is_ccw.astype(int).tolist())
+        
+        # Emit SVG elements in edge order
+        for kind, class_name, radius, offset, count in pending:
+            if kind == 'line':
+                p1_2d, p2_2d = pts_list[offset], pts_list[offset + 1]
+                svg_elements.append({
+                    'type': 'line',
+                    'class': class_name,
+                    'x1': p1_2d[0], 'y1': p1_2d[1],
+                    'x2': p2_2d[0], 'y2': p2_2d[1]
+                })
+                all_points.extend([p1_2d, p2_2d])
+                logger.debug("  Added SVG LINE: (%.2f,%.2f) to (%.2f,%.2f) - class: %s",
+                             p1_2d[0], p1_2d[1], p2_2d[0], p2_2d[1], class_name)
+            
+            elif kind == 'circle':
+                center_2d = pts_list[offset]
+                svg_elements.append({
+                    'type': 'circle',
+                    'class': class_name,
+                    'cx': center_2d[0], 'cy': center_2d[1],
+                    'r': radius
+                })
+                # Add circle bounds to points
+                all_points.extend([
+                    [center_2d[0] - radius, center_2d[1] - radius],
+                    [center_2d[0] + radius, center_2d[1] + radius]
+                ])
+                logger.debug("  Added SVG CIRCLE: center=(%.2f,%.2f), radius=%.2f - class: %s",
+                             center_2d[0], center_2d[1], radius, class_name)
+            
+            elif kind == 'arc':
+                angle_diff, large_arc, sweep_flag = next(arc_flags)
+                start_2d, end_2d = pts_list[offset + 1], pts_list[offset + 3]
+                svg_elements.append({
+                    'type': 'arc',
+                    'class': class_name,
+                    'start_x': start_2d[0], 'start_y': start_2d[1],
+                    'end_x': end_2d[0], 'end_y': end_2d[1],
+                    'radius': radius,
+                    'large_arc': large_arc,
+                    'sweep_flag': sweep_flag
+                })
+                all_points.extend([start_2d, end_2d])
+                logger.debug("  Added SVG ARC: start=(%.2f,%.2f) end=(%.2f,%.2f) radius=%.2f angle_diff=%.1f° ccw=%s large=%d sweep=%d - class: %s",
+                             start_2d[0], start_2d[1], end_2d[0], end_2d[1], radius, angle_diff,
+                             bool(sweep_flag), large_arc, sweep_flag, class_name)
+            
+            else:
+                points = pts_list[offset:offset + count]
+                svg_elements.append({
+                    'type': 'polyline',
+                    'class': class_name,
+                    'points': points
+                })
+                all_points.extend(points)
+        
+        self._face_cache[face_id] = (svg_elements, all_points)
+        return svg_elements, all_points
+    
+    def create_svg_from_step_edges(self, face_id):
+        """Extract actual edges from STEP face and convert to SVG"""
+        logger.debug("Extracting STEP edges for SVG for face %s", face_id)
+        
+        try:
+            svg_elements, all_points = self.get_svg_edge_elements(face_id)
             
             # Calculate bounding box
             if not all_points:
                 raise Exception("No geometry found for SVG")
             
-            min_x = min(p[0] for p in all_points)
-            max_x = max(p[0] for p in all_points)
-            min_y = min(p[1] for p in all_points)
-            max_y = max(p[1] for p in all_points)
+            points_arr = np.asarray(all_points, dtype=np.float64)
+            (min_x, min_y), (max_x, max_y) = points_arr.min(axis=0), points_arr.max(axis=0)
             
             # Add padding
             padding = max(max_x - min_x, max_y - min_y) * 0.1
@@ -540,7 +958,7 @@ class STEPProcessor:
             height = max_y - min_y
             
             # Create SVG content with real-world dimensions (millimeters)
-            svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+            parts = [f'''<?xml version="1.0" encoding="UTF-8"?>
 <svg xmlns="http://www.w3.org/2000/svg" width="{width:.3f}mm" height="{height:.3f}mm" 
      viewBox="{min_x:.3f} {min_y:.3f} {width:.3f} {height:.3f}">
   <defs>
@@ -549,7 +967,7 @@ class STEPProcessor:
       .hole {{ fill: none; stroke: #ff0000; stroke-width: 0.05mm; }}
     </style>
   </defs>
-'''
+''']
             
             # Consolidate arcs that form complete circles
             svg_elements = self.consolidate_circle_arcs(svg_elements)
@@ -557,52 +975,44 @@ class STEPProcessor:
             # Add geometry elements
             for element in svg_elements:
                 if element['type'] == 'line':
-                    svg_content += f'  <line x1="{element["x1"]:.3f}" y1="{element["y1"]:.3f}" x2="{element["x2"]:.3f}" y2="{element["y2"]:.3f}" class="{element["class"]}"/>\n'
+                    parts.append(f'  <line x1="{element["x1"]:.3f}" y1="{element["y1"]:.3f}" x2="{element["x2"]:.3f}" y2="{element["y2"]:.3f}" class="{element["class"]}"/>\n')
                 
                 elif element['type'] == 'circle':
-                    svg_content += f'  <circle cx="{element["cx"]:.3f}" cy="{element["cy"]:.3f}" r="{element["r"]:.3f}" class="{element["class"]}"/>\n'
+                    parts.append(f'  <circle cx="{element["cx"]:.3f}" cy="{element["cy"]:.3f}" r="{element["r"]:.3f}" class="{element["class"]}"/>\n')
                 
                 elif element['type'] == 'arc':
-                    svg_content += f'  <path d="M {element["start_x"]:.3f} {element["start_y"]:.3f} A {element["radius"]:.3f} {element["radius"]:.3f} 0 {element["large_arc"]} {element["sweep_flag"]} {element["end_x"]:.3f} {element["end_y"]:.3f}" class="{element["class"]}"/>\n'
+                    parts.append(f'  <path d="M {element["start_x"]:.3f} {element["start_y"]:.3f} A {element["radius"]:.3f} {element["radius"]:.3f} 0 {element["large_arc"]} {element["sweep_flag"]} {element["end_x"]:.3f} {element["end_y"]:.3f}" class="{element["class"]}"/>\n')
                 
                 elif element['type'] == 'polyline':
                     points_str = ' '.join(f"{p[0]:.3f},{p[1]:.3f}" for p in element['points'])
-                    svg_content += f'  <polyline points="{points_str}" class="{element["class"]}"/>\n'
-            
-            svg_content += '</svg>'
+                    parts.append(f'  <polyline points="{points_str}" class="{element["class"]}"/>\n')
             
-            # Save to temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.svg', mode='w', encoding='utf-8')
-            temp_file.write(svg_content)
-            temp_file.close()
+            parts.append('</svg>')
+            svg_bytes = ''.join(parts).encode('utf-8')
             
-            print(f"SVG created successfully: {temp_file.name}")
-            return temp_file.name
+            logger.debug("SVG created successfully (%s bytes)", len(svg_bytes))
+            return svg_bytes
             
         except Exception as e:
-            print(f"Error creating SVG from STEP edges: {e}")
+            logger.warning("Error creating SVG from STEP edges: %s", e)
             raise e
     
+    def arc_center_candidates(self, arcs, radius):
+        """Return both candidate centers of every arc as an (2K, 2) array"""
+        chords = np.array([(arc['start_x'], arc['start_y'], arc['end_x'], arc['end_y']) for arc in arcs],
+                          dtype=np.float64)
+        return compute_arc_centers(chords[:, :2], chords[:, 2:], radius)
+    
     def consolidate_circle_arcs(self, svg_elements):
         """Consolidate multiple arcs that form complete circles into single circle elements"""
         consolidated = []
         arcs_by_center_radius = {}
         
-        # Group arcs by center and radius
+        # Group arcs by radius and class
         for element in svg_elements:
             if element['type'] == 'arc':
-                # Calculate center from start point and radius (approximate)
-                start_x, start_y = element['start_x'], element['start_y']
-                end_x, end_y = element['end_x'], element['end_y']
-                radius = element['radius']
-                
-                # Calculate center point from arc geometry
-                # For now, use a simplified approach - group by radius and approximate center
-                mid_x = (start_x + end_x) / 2
-                mid_y = (start_y + end_y) / 2
-                
-                # Create a key for grouping (center coordinates rounded to avoid floating point issues)
-                center_key = (round(radius, 3), element['class'])
+                # Create a key for grouping (radius rounded to avoid floating point issues)
+                center_key = (round(element['radius'], 3), element['class'])
                 
                 if center_key not in arcs_by_center_radius:
                     arcs_by_center_radius[center_key] = []
@@ -615,70 +1025,22 @@ class STEPProcessor:
         for (radius, class_name), arcs in arcs_by_center_radius.items():
             if len(arcs) >= 2:
                 # Try to find the actual center point
-                centers = []
-                for arc in arcs:
-                    # Calculate center from start point, end point, and radius
-                    start_x, start_y = arc['start_x'], arc['start_y']
-                    end_x, end_y = arc['end_x'], arc['end_y']
-                    
-                    # Midpoint of chord
-                    mid_x = (start_x + end_x) / 2
-                    mid_y = (start_y + end_y) / 2
-                    
-                    # Distance from midpoint to start
-                    chord_half = ((end_x - start_x)**2 + (end_y - start_y)**2)**0.5 / 2
-                    
-                    if chord_half < radius:
-                        # Distance from midpoint to center
-                        center_distance = (radius**2 - chord_half**2)**0.5
-                        
-                        # Perpendicular direction
-                        if abs(end_x - start_x) > 0.001:
-                            perp_x = -(end_y - start_y)
-                            perp_y = (end_x - start_x)
-                        else:
-                            perp_x = 1
-                            perp_y = 0
-                        
-                        # Normalize perpendicular vector
-                        perp_length = (perp_x**2 + perp_y**2)**0.5
-                        if perp_length > 0:
-                            perp_x /= perp_length
-                            perp_y /= perp_length
-                        
-                        # Two possible centers
-                        center1_x = mid_x + perp_x * center_distance
-                        center1_y = mid_y + perp_y * center_distance
-                        center2_x = mid_x - perp_x * center_distance
-                        center2_y = mid_y - perp_y * center_distance
-                        
-                        centers.append((center1_x, center1_y))
-                        centers.append((center2_x, center2_y))
+                centers = self.arc_center_candidates(arcs, radius)
                 
                 # Find the most common center (within tolerance)
-                if centers:
+                if len(centers):
                     tolerance = 0.1
-                    center_groups = []
                     
-                    for cx, cy in centers:
-                        added_to_group = False
-                        for group in center_groups:
-                            group_cx, group_cy = group[0]
-                            if abs(cx - group_cx) < tolerance and abs(cy - group_cy) < tolerance:
-                                group.append((cx, cy))
-                                added_to_group = True
-                                break
-                        
-                        if not added_to_group:
-                            center_groups.append([(cx, cy)])
+                    # Bucket centers on a tolerance-sized grid and merge touching buckets
+                    # instead of comparing every pair
+                    labels = cluster_centers(centers, tolerance)
                     
                     # Find the largest group (most common center)
-                    if center_groups:
-                        largest_group = max(center_groups, key=len)
+                    if len(labels):
+                        largest_group = centers[labels == np.argmax(np.bincount(labels))]
                         if len(largest_group) >= len(arcs):  # All arcs should share the same center
                             # Calculate average center
-                            avg_cx = sum(cx for cx, cy in largest_group) / len(largest_group)
-                            avg_cy = sum(cy for cx, cy in largest_group) / len(largest_group)
+                            avg_cx, avg_cy = largest_group.mean(axis=0).tolist()
                             
                             # Check if the arcs cover the full circle (approximately)
                             total_angle = 0
@@ -692,7 +1054,8 @@ class STEPProcessor:
                             
                             # If total angle suggests a complete circle, consolidate
                             if total_angle >= 300:  # Allow some tolerance
-                                print(f"  Consolidating {len(arcs)} arcs into circle: center=({avg_cx:.2f},{avg_cy:.2f}), radius={radius:.2f}, class={class_name}")
+                                logger.debug("  Consolidating %d arcs into circle: center=(%.2f,%.2f), radius=%.2f, class=%s",
+                                             len(arcs), avg_cx, avg_cy, radius, class_name)
                                 consolidated.append({
                                     'type': 'circle',
                                     'class': class_name,
@@ -712,7 +1075,7 @@ class STEPProcessor:
     
     def create_svg_from_mesh(self, face_id):
         """Create SVG from mesh data (fallback method)"""
-        print(f"Creating SVG from mesh for face {face_id}")
+        logger.debug("Creating SVG from mesh for face %s", face_id)
         
         try:
             face_data = self.face_data[face_id]
@@ -720,17 +1083,15 @@ class STEPProcessor:
             vertices = mesh['vertices']
             triangles = mesh.get('triangles', [])
             
-            if not vertices:
+            if not len(vertices):
                 raise Exception("No vertices found in mesh")
             
             # Project to 2D
             projected_vertices = self.project_to_face_plane(vertices, face_id)
             
-            # Calculate bounding box
-            min_x = min(v[0] for v in projected_vertices)
-            max_x = max(v[0] for v in projected_vertices)
-            min_y = min(v[1] for v in projected_vertices)
-            max_y = max(v[1] for v in projected_vertices)
+            # Calculate bounding box in one reduction pass per axis
+            min_x, min_y = projected_vertices.min(axis=0)
+            max_x, max_y = projected_vertices.max(axis=0)
             
             width = max_x - min_x
             height = max_y - min_y
@@ -745,7 +1106,7 @@ class STEPProcessor:
             height = max_y - min_y
             
             # Create SVG content with real-world dimensions (millimeters)
-            svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+            parts = [f'''<?xml version="1.0" encoding="UTF-8"?>
 <svg xmlns="http://www.w3.org/2000/svg" width="{width:.3f}mm" height="{height:.3f}mm" 
      viewBox="{min_x:.3f} {min_y:.3f} {width:.3f} {height:.3f}">
   <defs>
@@ -753,49 +1114,52 @@ class STEPProcessor:
       .face {{ fill: none; stroke: #000000; stroke-width: 0.1mm; }}
     </style>
   </defs>
-'''
-            
-            # Add triangles as polygons
-            for triangle in triangles:
-                if len(triangle) == 3:
-                    points = []
-                    for vertex_idx in triangle:
-                        if vertex_idx < len(projected_vertices):
-                            v = projected_vertices[vertex_idx]
-                            points.append(f"{v[0]:.3f},{v[1]:.3f}")
-                    
-                    if len(points) == 3:
-                        svg_content += f'  <polygon points="{" ".join(points)}" class="face"/>\n'
+''']
+            
+            # Add triangles as polygons, gathering all corners with one fancy-index
+            tris = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+            tris = tris[(tris < len(projected_vertices)).all(axis=1)]
             
-            svg_content += '</svg>'
+            # Skip degenerate triangles (repeated vertex index)
+            tris = tris[(tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 2] != tris[:, 0])]
             
-            # Save to temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.svg', mode='w', encoding='utf-8')
-            temp_file.write(svg_content)
-            temp_file.close()
+            # Format every polygon with a single %-operation over the flattened corners
+            corners = projected_vertices[tris].reshape(-1).tolist()
+            parts.append((SVG_POLYGON_FORMAT * len(tris)) % tuple(corners))
             
-            print(f"SVG created successfully from mesh: {temp_file.name}")
-            return temp_file.name
+            parts.append('</svg>')
+            svg_content = ''.join(parts)
+            svg_bytes = svg_content.encode('utf-8')
+            
+            logger.debug("SVG created successfully from mesh (%s bytes)", len(svg_bytes))
+            return svg_bytes
             
         except Exception as e:
-            print(f"Error creating SVG from mesh: {e}")
+            logger.warning("Error creating SVG from mesh: %s", e)
             raise e
     
     def create_dxf_from_step_edges(self, face_id, doc, msp):
         """Extract actual edges from STEP face and convert to DXF"""
-        print(f"Extracting STEP edges for face {face_id}")
+        logger.debug("Extracting STEP edges for face %s", face_id)
         
         try:
-            from OCC.Core.TopExp import TopExp_Explorer
-            from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_WIRE
-            from OCC.Core.BRep import BRep_Tool
-            from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
-            from OCC.Core.GeomAbs import GeomAbs_Line, GeomAbs_Circle, GeomAbs_Ellipse, GeomAbs_BSplineCurve
-            from OCC.Core.BRepTools import BRepTools_WireExplorer
-            import math
-            
             face = self.faces[face_id]
             
+            # Edges only record their 3D samples during the walk; each wire's samples
+            # are projected in one batch and the entities are emitted afterwards in edge order
+            sample_pts = []
+            pending = []  # (type, offset, extra) into sample_pts
+            
+            def add_samples(*points):
+                offset = len(sample_pts)
+                sample_pts.extend([p.X(), p.Y(), p.Z()] for p in points)
+                return offset
+            
+            # Loop-invariant lookups bound once for the edge walk and entity emission
+            add_pending = pending.append
+            edge_curve = BRep_Tool.Curve
+            add_line, add_circle, add_arc, add_ellipse = msp.add_line, msp.add_circle, msp.add_arc, msp.add_ellipse
+            
             # Get all wires from the face
             wire_explorer = TopExp_Explorer(face, TopAbs_WIRE)
             wire_count = 0
@@ -803,16 +1167,22 @@ class STEPProcessor:
             while wire_explorer.More():
                 wire = wire_explorer.Current()
                 wire_count += 1
-                print(f"Processing wire {wire_count}")
+                logger.debug("Processing wire %d", wire_count)
                 
                 # Determine layer name
                 layer_name = 'BOUNDARY' if wire_count == 1 else 'HOLES'
                 
                 # Create layer if not exists
-                if layer_name not in [layer.dxf.name for layer in doc.layers]:
+                if layer_name not in doc.layers:
                     color = 1 if layer_name == 'BOUNDARY' else 2
                     doc.layers.new(layer_name, dxfattribs={'color': color})
                 
+                # One attribute dict per wire, shared by every entity (ezdxf copies it)
+                edge_attrs = {'layer': layer_name}
+                
+                sample_pts.clear()
+                pending.clear()
+                
                 # Process each edge in the wire
                 edge_explorer = BRepTools_WireExplorer(wire)
                 
@@ -821,7 +1191,7 @@ class STEPProcessor:
                     
                     try:
                         # Get curve from edge
-                        curve, first, last = BRep_Tool.Curve(edge)
+                        curve, first, last = edge_curve(edge)
                         if curve:
                             # Analyze curve type
                             adaptor = BRepAdaptor_Curve(edge)
@@ -829,16 +1199,7 @@ class STEPProcessor:
                             
                             if curve_type == GeomAbs_Line:
                                 # Line: add as LINE entity
-                                p1 = curve.Value(first)
-                                p2 = curve.Value(last)
-                                p1_2d = self.simple_project_to_2d([[p1.X(), p1.Y(), p1.Z()]], face_id)[0]
-                                p2_2d = self.simple_project_to_2d([[p2.X(), p2.Y(), p2.Z()]], face_id)[0]
-                                
-                                msp.add_line(
-                                    p1_2d, p2_2d,
-                                    dxfattribs={'layer': layer_name}
-                                )
-                                print(f"  Added LINE: ({p1_2d[0]:.2f},{p1_2d[1]:.2f}) to ({p2_2d[0]:.2f},{p2_2d[1]:.2f})")
+                                add_pending(('line', add_samples(curve.Value(first), curve.Value(last)), None))
                                 
                             elif curve_type == GeomAbs_Circle:
                                 # Circle/Arc: add as CIRCLE or ARC entity
@@ -848,76 +1209,23 @@ class STEPProcessor:
                                     center = circle.Location()
                                     radius = circle.Radius()
                                     
-                                    # Project center to 2D
-                                    center_2d = self.simple_project_to_2d([[center.X(), center.Y(), center.Z()]], face_id)[0]
-                                    
                                     # Check if it's a full circle or arc
                                     param_range = abs(last - first)
                                     is_full_circle = abs(param_range - 2 * math.pi) < 0.01
                                     
                                     if is_full_circle:
                                         # Add as CIRCLE
-                                        msp.add_circle(
-                                            center_2d, radius,
-                                            dxfattribs={'layer': layer_name}
-                                        )
-                                        print(f"  Added CIRCLE: center=({center_2d[0]:.2f},{center_2d[1]:.2f}), radius={radius:.2f}")
+                                        add_pending(('circle', add_samples(center), radius))
                                     else:
-                                        # Add as ARC - proper angle calculation
-                                        # Get start and end points
-                                        start_point = curve.Value(first)
-                                        end_point = curve.Value(last)
-                                        
-                                        # Project start and end points to 2D
-                                        start_2d = self.simple_project_to_2d([[start_point.X(), start_point.Y(), start_point.Z()]], face_id)[0]
-                                        end_2d = self.simple_project_to_2d([[end_point.X(), end_point.Y(), end_point.Z()]], face_id)[0]
-                                        
-                                        # Calculate angles relative to center in 2D space
-                                        start_angle_rad = math.atan2(start_2d[1] - center_2d[1], start_2d[0] - center_2d[0])
-                                        end_angle_rad = math.atan2(end_2d[1] - center_2d[1], end_2d[0] - center_2d[0])
-                                        
-                                        # Convert to degrees
-                                        start_angle_deg = math.degrees(start_angle_rad) % 360
-                                        end_angle_deg = math.degrees(end_angle_rad) % 360
-                                        
-                                        # 実際の円弧の向きを確認するために中間点をサンプリング
-                                        mid_param = (first + last) / 2
-                                        mid_point = curve.Value(mid_param)
-                                        mid_2d = self.simple_project_to_2d([[mid_point.X(), mid_point.Y(), mid_point.Z()]], face_id)[0]
-                                        mid_angle_rad = math.atan2(mid_2d[1] - center_2d[1], mid_2d[0] - center_2d[0])
-                                        mid_angle_deg = math.degrees(mid_angle_rad) % 360
-                                        
-                                        # 中間点が開始角度と終了角度の間にあるかをチェック
-                                        def is_angle_between_ccw(start, end, mid):
-                                            """反時計回りで mid が start と end の間にあるかチェック"""
-                                            # 全て0-360の範囲に正規化
-                                            start, end, mid = start % 360, end % 360, mid % 360
-                                            
-                                            if start <= end:
-                                                # 通常の場合: start < mid < end
-                                                return start <= mid <= end
-                                            else:
-                                                # 0度をまたぐ場合: mid >= start or mid <= end
-                                                return mid >= start or mid <= end
-                                        
-                                        # 中間点が start から end への反時計回りの経路上にあるかチェック
-                                        is_ccw = is_angle_between_ccw(start_angle_deg, end_angle_deg, mid_angle_deg)
-                                        
-                                        if not is_ccw:
-                                            # 時計回りの場合、角度を入れ替える
-                                            start_angle_deg, end_angle_deg = end_angle_deg, start_angle_deg
-
-                                        msp.add_arc(
-                                            center_2d, radius,
-                                            start_angle_deg, end_angle_deg,
-                                            dxfattribs={'layer': layer_name}
-                                        )
-                                        print(f"  Added ARC: center=({center_2d[0]:.2f},{center_2d[1]:.2f}), radius={radius:.2f}, angles={start_angle_deg:.1f}°-{end_angle_deg:.1f}°")
+                                        # Add as ARC - center, start, end and mid point (実際の円弧の向きを確認するため)
+                                        offset = add_samples(center, curve.Value(first), curve.Value(last),
+                                                             curve.Value((first + last) / 2))
+                                        add_pending(('arc', offset, radius))
                                 
                                 except Exception as circle_error:
-                                    print(f"  Error processing circle/arc: {circle_error}")
+                                    logger.warning("  Error processing circle/arc: %s", circle_error)
                                     # Fallback to polyline
-                                    self.add_curve_as_polyline(edge, curve, first, last, msp, layer_name, face_id)
+                                    add_pending(('curve', None, (edge, curve, first, last)))
                                 
                             elif curve_type == GeomAbs_Ellipse:
                                 # Ellipse: add as ELLIPSE entity
@@ -927,116 +1235,159 @@ class STEPProcessor:
                                     major_radius = ellipse.MajorRadius()
                                     minor_radius = ellipse.MinorRadius()
                                     
-                                    # Project center to 2D
-                                    center_2d = self.simple_project_to_2d([[center.X(), center.Y(), center.Z()]], face_id)[0]
-                                    
-                                    # Get major axis direction
+                                    # Major axis direction is projected together with the center
                                     major_axis = ellipse.XAxis().Direction()
-                                    major_axis_2d = self.simple_project_to_2d([[major_axis.X(), major_axis.Y(), major_axis.Z()]], face_id)[0]
-                                    
-                                    # Calculate ratio
-                                    ratio = minor_radius / major_radius
                                     
                                     # Check if it's a full ellipse or arc
                                     param_range = abs(last - first)
                                     is_full_ellipse = abs(param_range - 2 * math.pi) < 0.01
                                     
                                     if is_full_ellipse:
-                                        msp.add_ellipse(
-                                            center_2d,
-                                            major_axis_2d,
-                                            ratio,
-                                            dxfattribs={'layer': layer_name}
-                                        )
-                                        print(f"  Added ELLIPSE: center=({center_2d[0]:.2f},{center_2d[1]:.2f}), major={major_radius:.2f}, minor={minor_radius:.2f}")
+                                        add_pending(('ellipse', add_samples(center, major_axis), (major_radius, minor_radius)))
                                     else:
                                         # Elliptical arc - use polyline approximation
-                                        self.add_curve_as_polyline(edge, curve, first, last, msp, layer_name, face_id)
+                                        add_pending(('curve', None, (edge, curve, first, last)))
                                 
                                 except Exception as ellipse_error:
-                                    print(f"  Error processing ellipse: {ellipse_error}")
+                                    logger.warning("  Error processing ellipse: %s", ellipse_error)
                                     # Fallback to polyline
-                                    self.add_curve_as_polyline(edge, curve, first, last, msp, layer_name, face_id)
+                                    add_pending(('curve', None, (edge, curve, first, last)))
                                 
                             else:
                                 # Other curves (B-splines, etc.): use polyline approximation
-                                self.add_curve_as_polyline(edge, curve, first, last, msp, layer_name)
+                                add_pending(('curve', None, (edge, curve, first, last)))
                     
                     except Exception as edge_error:
-                        print(f"  Error processing edge: {edge_error}")
+                        logger.warning("  Error processing edge: %s", edge_error)
                     
                     edge_explorer.Next()
                 
+                # Project every sample of this wire at once
+                pts_arr = self._get_projector(face_id).project(sample_pts)
+                pts_2d = pts_arr.tolist()
+                
+                # Resolve all arc angles of this wire at once (center, start, end, mid per arc)
+                arc_offsets = [offset for kind, offset, _ in pending if kind == 'arc']
+                arc_angles = iter(())
+                if arc_offsets:
+                    arc_2d = pts_arr[np.asarray(arc_offsets)[:, None] + np.arange(4)]
+                    rel = arc_2d[:, 1:, :] - arc_2d[:, :1, :]
+                    
+                    # Start/end angles relative to the center in degrees [0, 360)
+                    angles = np.degrees(np.arctan2(rel[:, :2, 1], rel[:, :2, 0])) % 360
+                    
+                    # 中間点が start から end への反時計回りの経路上にあるかチェック
+                    # 時計回りの場合、角度を入れ替える
+                    is_ccw = is_arc_ccw(rel[:, 0], rel[:, 1], rel[:, 2])
+                    angles = np.where(is_ccw[:, None], angles, angles[:, ::-1])
+                    arc_angles = iter(angles.tolist())
+                
+                for kind, offset, extra in pending:
+                    try:
+                        if kind == 'line':
+                            p1_2d, p2_2d = pts_2d[offset:offset + 2]
+                            add_line(
+                                p1_2d, p2_2d,
+                                dxfattribs=edge_attrs
+                            )
+                            logger.debug("  Added LINE: (%.2f,%.2f) to (%.2f,%.2f)", p1_2d[0], p1_2d[1], p2_2d[0], p2_2d[1])
+                        
+                        elif kind == 'circle':
+                            center_2d, radius = pts_2d[offset], extra
+                            add_circle(
+                                center_2d, radius,
+                                dxfattribs=edge_attrs
+                            )
+                            logger.debug("  Added CIRCLE: center=(%.2f,%.2f), radius=%.2f", center_2d[0], center_2d[1], radius)
+                        
+                        elif kind == 'arc':
+                            center_2d, radius = pts_2d[offset], extra
+                            start_angle_deg, end_angle_deg = next(arc_angles)
+                            
+                            add_arc(
+                                center_2d, radius,
+                                start_angle_deg, end_angle_deg,
+                                dxfattribs=edge_attrs
+                            )
+                            logger.debug("  Added ARC: center=(%.2f,%.2f), radius=%.2f, angles=%.1f°-%.1f°",
+                                         center_2d[0], center_2d[1], radius, start_angle_deg, end_angle_deg)
+                        
+                        elif kind == 'ellipse':
+                            center_2d, major_axis_2d = pts_2d[offset:offset + 2]
+                            major_radius, minor_radius = extra
+                            
+                            # Calculate ratio
+                            ratio = minor_radius / major_radius
+                            
+                            add_ellipse(
+                                center_2d,
+                                major_axis_2d,
+                                ratio,
+                                dxfattribs=edge_attrs
+                            )
+                            logger.debug("  Added ELLIPSE: center=(%.2f,%.2f), major=%.2f, minor=%.2f",
+                                         center_2d[0], center_2d[1], major_radius, minor_radius)
+                        
+                        else:
+                            edge, curve, first, last = extra
+                            self.add_curve_as_polyline(edge, curve, first, last, msp, edge_attrs, face_id)
+                    
+                    except Exception as edge_error:
+                        logger.warning("  Error processing edge: %s", edge_error)
+                
                 wire_explorer.Next()
             
-            # Save file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.dxf')
+            # Serialize in memory
             try:
-                doc.saveas(temp_file.name)
-                temp_file.close()
-                print(f"STEP-based DXF saved to: {temp_file.name}")
-                return temp_file.name, wire_count
+                dxf_bytes = dxf_to_bytes(doc)
+                logger.debug("STEP-based DXF created (%s bytes)", len(dxf_bytes))
+                return dxf_bytes, wire_count
             except Exception as save_error:
-                temp_file.close()
                 raise Exception(f"Failed to save STEP-based DXF: {str(save_error)}")
                 
         except Exception as e:
-            print(f"STEP edge extraction error: {e}")
+            logger.warning("STEP edge extraction error: %s", e)
             raise e
     
-    def add_curve_as_polyline(self, edge, curve, first, last, msp, layer_name, face_id):
+    def add_curve_as_polyline(self, edge, curve, first, last, msp, dxfattribs, face_id):
         """Add a curve as polyline approximation for complex curves"""
         try:
-            # Sample points along the curve
+            # Sample points along the curve (OCC has no batch evaluation, so only this stays a loop)
             num_points = 12  # Good balance between accuracy and file size
-            points_3d = []
-            
-            for i in range(num_points + 1):
-                param = first + (last - first) * i / num_points
-                point = curve.Value(param)
-                points_3d.append([point.X(), point.Y(), point.Z()])
+            params = np.linspace(first, last, num_points + 1).tolist()
+            points_3d = [[point.X(), point.Y(), point.Z()] for point in map(curve.Value, params)]
             
             # Project to 2D
-            points_2d = self.simple_project_to_2d(points_3d, face_id)
-            
-            if len(points_2d) >= 2:
-                # Remove consecutive duplicates
-                clean_points = [points_2d[0]]
-                for i in range(1, len(points_2d)):
-                    prev = clean_points[-1]
-                    curr = points_2d[i]
-                    dist = ((curr[0] - prev[0])**2 + (curr[1] - prev[1])**2)**0.5
-                    if dist > 0.001:  # Very small threshold
-                        clean_points.append(curr)
-                
-                if len(clean_points) >= 2:
-                    # Add as polyline
-                    msp.add_lwpolyline(
-                        clean_points,
-                        close=False,
-                        dxfattribs={'layer': layer_name}
-                    )
-                    print(f"  Added POLYLINE approximation with {len(clean_points)} points")
+            points_2d = self._get_projector(face_id).project(points_3d)
+            
+            # Remove consecutive duplicates
+            clean_points = dedup_points(points_2d, 0.001)  # Very small threshold
+            
+            if len(clean_points) >= 2:
+                # Add as polyline
+                msp.add_lwpolyline(
+                    clean_points.tolist(),
+                    close=False,
+                    dxfattribs=dxfattribs
+                )
+                logger.debug("  Added POLYLINE approximation with %d points", len(clean_points))
         
         except Exception as e:
-            print(f"  Error adding curve as polyline: {e}")
+            logger.warning("  Error adding curve as polyline: %s", e)
     
     def create_dxf_from_mesh_improved(self, face_id, doc, msp):
         """Improved mesh-based DXF creation with better edge detection"""
-        print(f"Creating improved mesh-based DXF for face {face_id}")
+        logger.debug("Creating improved mesh-based DXF for face %s", face_id)
         
         # Get face data
         face_data = self.face_data[face_id]
         mesh = face_data['mesh']
         vertices = mesh['vertices']
         
-        if not vertices or len(vertices) < 3:
+        if len(vertices) < 3:
             # Create simple test shape
             msp.add_lwpolyline([(0, 0), (10, 0), (10, 10), (0, 10)], close=True)
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.dxf')
-            doc.saveas(temp_file.name)
-            temp_file.close()
-            return temp_file.name, 1
+            return dxf_to_bytes(doc), 1
         
         # Project vertices to 2D plane
         points_2d = self.simple_project_to_2d(vertices, face_id)
@@ -1044,120 +1395,60 @@ class STEPProcessor:
         if not points_2d or len(points_2d) < 3:
             # Fallback
             msp.add_lwpolyline([(0, 0), (10, 0), (10, 10), (0, 10)], close=True)
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.dxf')
-            doc.saveas(temp_file.name)
-            temp_file.close()
-            return temp_file.name, 1
+            return dxf_to_bytes(doc), 1
         
         # Use triangles to find actual edges
         boundary_edges = []
         triangles = mesh.get('triangles', [])
         
-        if triangles:
+        if len(triangles):
             # Find boundary edges (edges that appear in only one triangle)
-            edge_count = {}
-            for triangle in triangles:
-                edges = [
-                    (min(triangle[0], triangle[1]), max(triangle[0], triangle[1])),
-                    (min(triangle[1], triangle[2]), max(triangle[1], triangle[2])),
-                    (min(triangle[2], triangle[0]), max(triangle[2], triangle[0]))
-                ]
-                for edge in edges:
-                    edge_count[edge] = edge_count.get(edge, 0) + 1
-            
-            # Get boundary edges (appear only once)
-            for edge, count in edge_count.items():
-                if count == 1:
-                    boundary_edges.append(edge)
+            boundary_edges = find_boundary_edges(triangles).tolist()
             
-            print(f"Found {len(boundary_edges)} boundary edges from {len(triangles)} triangles")
+            logger.debug("Found %s boundary edges from %s triangles", len(boundary_edges), len(triangles))
         
         if boundary_edges:
             # Convert boundary edges to connected path
             boundary_path = self.edges_to_path(boundary_edges, points_2d)
             if boundary_path and len(boundary_path) >= 3:
                 msp.add_lwpolyline(boundary_path, close=True)
-                print(f"Added boundary path with {len(boundary_path)} points")
+                logger.debug("Added boundary path with %s points", len(boundary_path))
         else:
             # Fallback to convex hull
             boundary = self.extract_boundary(points_2d)
             if boundary and len(boundary) >= 3:
                 msp.add_lwpolyline(boundary, close=True)
-                print(f"Added fallback boundary with {len(boundary)} points")
+                logger.debug("Added fallback boundary with %s points", len(boundary))
         
-        # Save file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.dxf')
+        # Serialize in memory
         try:
-            doc.saveas(temp_file.name)
-            temp_file.close()
-            print(f"Mesh-based DXF saved to: {temp_file.name}")
-            return temp_file.name, 1
+            dxf_bytes = dxf_to_bytes(doc)
+            logger.debug("Mesh-based DXF created (%s bytes)", len(dxf_bytes))
+            return dxf_bytes, 1
         except Exception as e:
-            temp_file.close()
             raise Exception(f"Failed to save mesh-based DXF: {str(e)}")
     
     def edges_to_path(self, edges, vertices):
         """Convert edge list to connected path"""
-        if not edges:
+        if not len(edges):
             return []
         
-        # Build adjacency map
-        adjacency = {}
-        for v1, v2 in edges:
-            if v1 not in adjacency:
-                adjacency[v1] = []
-            if v2 not in adjacency:
-                adjacency[v2] = []
-            adjacency[v1].append(v2)
-            adjacency[v2].append(v1)
-        
-        # Find a starting vertex (preferably with degree 2)
-        start_vertex = None
-        for vertex, neighbors in adjacency.items():
-            if len(neighbors) <= 2:
-                start_vertex = vertex
-                break
-        
-        if start_vertex is None:
-            start_vertex = list(adjacency.keys())[0]
-        
-        # Trace the path
-        path = [start_vertex]
-        current = start_vertex
-        previous = None
-        
-        while True:
-            neighbors = [n for n in adjacency[current] if n != previous]
-            if not neighbors:
-                break
-            
-            next_vertex = neighbors[0]
-            if next_vertex == start_vertex and len(path) > 2:
-                break  # Completed the loop
-            
-            path.append(next_vertex)
-            previous = current
-            current = next_vertex
-            
-            if len(path) > len(edges) + 1:  # Prevent infinite loops
-                break
+        # Trace the path over a CSR adjacency (Numba-compiled when available)
+        path = trace_edge_path(edges)
         
         # Convert vertex indices to 2D coordinates
-        path_2d = []
-        for vertex_idx in path:
-            if vertex_idx < len(vertices):
-                path_2d.append(vertices[vertex_idx])
-        
-        return path_2d
+        vertex_count = len(vertices)
+        return [vertices[vertex_idx] for vertex_idx in path.tolist() if vertex_idx < vertex_count]
     
     def get_face_normal(self, face_id):
-        """面の法線ベクトルを計算"""
+        """面の法線ベクトルを計算 (OCC で求めた法線は面IDごとにキャッシュ)"""
+        normal = self._normal_cache.get(face_id)
+        if normal is not None:
+            return normal
+        
         try:
             if HAS_PYTHONOCC and hasattr(self, 'step_shape') and self.step_shape and face_id < len(self.faces):
                 from OCC.Core.BRepGProp import brepgprop_SurfaceProperties
-                from OCC.Core.GProp import GProp_GProps
-                from OCC.Core.BRepLProp import BRepLProp_SLProps
-                from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
                 
                 face = self.faces[face_id]
                 
@@ -1178,13 +1469,15 @@ class STEPProcessor:
                 props = BRepLProp_SLProps(surface, u_mid, v_mid, 1, 1e-6)
                 if props.IsNormalDefined():
                     normal = props.Normal()
-                    return [normal.X(), normal.Y(), normal.Z()]
+                    normal = [normal.X(), normal.Y(), normal.Z()]
+                    self._normal_cache[face_id] = normal
+                    return normal
             
             # フォールバック: メッシュから法線を計算
             return self.calculate_mesh_normal(face_id)
             
         except Exception as e:
-            print(f"Error calculating face normal: {e}")
+            logger.warning("Error calculating face normal: %s", e)
             return self.calculate_mesh_normal(face_id)
     
     def calculate_mesh_normal(self, face_id):
@@ -1195,155 +1488,115 @@ class STEPProcessor:
             vertices = mesh['vertices']
             triangles = mesh.get('triangles', [])
             
-            if len(vertices) < 3 or not triangles:
+            if len(vertices) < 3 or not len(triangles):
                 return [0, 0, 1]  # デフォルト: Z軸方向
             
-            # 最初の三角形から法線を計算
-            triangle = triangles[0]
-            if len(triangle) >= 3:
-                v1 = vertices[triangle[0]]
-                v2 = vertices[triangle[1]]
-                v3 = vertices[triangle[2]]
-                
-                # 外積で法線ベクトルを計算
-                edge1 = [v2[0] - v1[0], v2[1] - v1[1], v2[2] - v1[2]]
-                edge2 = [v3[0] - v1[0], v3[1] - v1[1], v3[2] - v1[2]]
-                
-                normal = [
-                    edge1[1] * edge2[2] - edge1[2] * edge2[1],
-                    edge1[2] * edge2[0] - edge1[0] * edge2[2],
-                    edge1[0] * edge2[1] - edge1[1] * edge2[0]
-                ]
-                
-                # 正規化
-                length = (normal[0]**2 + normal[1]**2 + normal[2]**2)**0.5
-                if length > 0:
-                    normal = [normal[0]/length, normal[1]/length, normal[2]/length]
-                
-                return normal
+            # 全三角形の外積の和 (面積で重み付け、面積ゼロの三角形は除外)
+            normal = mesh_normal_sum(vertices, triangles)
+            
+            # 正規化
+            length = np.linalg.norm(normal)
+            if length > 0:
+                return (normal / length).tolist()
             
             return [0, 0, 1]  # デフォルト
             
         except Exception as e:
-            print(f"Error calculating mesh normal: {e}")
+            logger.warning("Error calculating mesh normal: %s", e)
             return [0, 0, 1]
     
-    def project_to_face_plane(self, vertices, face_id):
-        """面の法線ベクトルを基準にした適切な2D投影"""
-        if not vertices:
-            return []
+    def _get_projector(self, face_id):
+        """面の投影基底 (u, v) を計算し、FaceProjector として面IDごとにキャッシュする"""
+        projector = self._projectors.get(face_id)
+        if projector is not None:
+            return projector
         
         # 面の法線ベクトルを取得
         normal = self.get_face_normal(face_id)
-        print(f"Face {face_id} normal: [{normal[0]:.3f}, {normal[1]:.3f}, {normal[2]:.3f}]")
+        logger.debug("Face %s normal: [%.3f, %.3f, %.3f]", face_id, normal[0], normal[1], normal[2])
         
         # 法線ベクトルを正規化
-        length = (normal[0]**2 + normal[1]**2 + normal[2]**2)**0.5
+        normal = np.asarray(normal, dtype=np.float64)
+        length = np.linalg.norm(normal)
         if length > 0:
-            normal = [normal[0]/length, normal[1]/length, normal[2]/length]
+            normal = normal / length
         
         # 法線ベクトルに基づいて適切な投影軸を決定
-        abs_normal = [abs(normal[0]), abs(normal[1]), abs(normal[2])]
-        max_component = max(abs_normal)
+        abs_normal = np.abs(normal)
+        max_component = abs_normal.max()
         
         if abs_normal[2] == max_component:
             # Z成分が最大 -> XY平面への投影
-            u_axis = [1, 0, 0]
-            v_axis = [0, 1, 0]
-            print("Projecting to XY plane")
+            u_axis = np.array([1.0, 0.0, 0.0])
+            v_axis = np.array([0.0, 1.0, 0.0])
+            logger.debug("Projecting to XY plane")
         elif abs_normal[1] == max_component:
             # Y成分が最大 -> XZ平面への投影
-            u_axis = [1, 0, 0]
-            v_axis = [0, 0, 1]
-            print("Projecting to XZ plane")
+            u_axis = np.array([1.0, 0.0, 0.0])
+            v_axis = np.array([0.0, 0.0, 1.0])
+            logger.debug("Projecting to XZ plane")
         else:
             # X成分が最大 -> YZ平面への投影
-            u_axis = [0, 1, 0]
-            v_axis = [0, 0, 1]
-            print("Projecting to YZ plane")
+            u_axis = np.array([0.0, 1.0, 0.0])
+            v_axis = np.array([0.0, 0.0, 1.0])
+            logger.debug("Projecting to YZ plane")
         
         # より正確な投影のため、法線に垂直な2つのベクトルを計算
         # Gram-Schmidt 直交化プロセスを使用
         def normalize_vector(v):
-            length = (v[0]**2 + v[1]**2 + v[2]**2)**0.5
-            return [v[0]/length, v[1]/length, v[2]/length] if length > 0 else v
-        
-        def dot_product(a, b):
-            return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
-        
-        def subtract_vectors(a, b):
-            return [a[0]-b[0], a[1]-b[1], a[2]-b[2]]
-        
-        def scale_vector(v, s):
-            return [v[0]*s, v[1]*s, v[2]*s]
+            length = np.linalg.norm(v)
+            return v / length if length > 0 else v
         
         # 法線に垂直な第一軸を計算
-        dot_nu = dot_product(normal, u_axis)
-        u_proj = subtract_vectors(u_axis, scale_vector(normal, dot_nu))
-        u_proj = normalize_vector(u_proj)
+        u_proj = normalize_vector(u_axis - (normal @ u_axis) * normal)
         
         # 法線と第一軸に垂直な第二軸を計算
-        dot_nv = dot_product(normal, v_axis)
-        dot_uv = dot_product(u_proj, v_axis)
-        v_proj = subtract_vectors(v_axis, scale_vector(normal, dot_nv))
-        v_proj = subtract_vectors(v_proj, scale_vector(u_proj, dot_uv))
-        v_proj = normalize_vector(v_proj)
-        
-        # 各頂点を2D平面に投影
-        points_2d = []
-        for vertex in vertices:
-            u_coord = dot_product(vertex, u_proj)
-            v_coord = dot_product(vertex, v_proj)
-            points_2d.append((u_coord, v_coord))
-        
-        print(f"Projected {len(vertices)} vertices to 2D")
+        v_proj = normalize_vector(v_axis - (normal @ v_axis) * normal - (u_proj @ v_axis) * u_proj)
+        
+        # 行ごとに u, v 軸を持つ (2, 3) 行列としてキャッシュ
+        projector = FaceProjector(np.stack((u_proj, v_proj)))
+        self._projectors[face_id] = projector
+        return projector
+    
+    def project_to_face_plane(self, vertices, face_id):
+        """面の法線ベクトルを基準にした適切な2D投影 ((N, 2) の配列を返す)"""
+        if not len(vertices):
+            return np.empty((0, 2), dtype=np.float64)
+        
+        points_2d = self._get_projector(face_id).project(vertices)
+        logger.debug("Projected %s vertices to 2D", len(vertices))
         return points_2d
     
     def simple_project_to_2d(self, vertices, face_id=None):
         """面IDが指定されている場合は適切な投影、そうでなければ従来の方法"""
         if face_id is not None:
-            return self.project_to_face_plane(vertices, face_id)
+            # 呼び出し側はタプルのリストを前提としている
+            return list(map(tuple, self.project_to_face_plane(vertices, face_id).tolist()))
         
         # 従来の簡易投影（後方互換性のため）
-        if not vertices:
+        if not len(vertices):
             return []
         
-        # Find the plane with least variation
-        x_coords = [v[0] for v in vertices]
-        y_coords = [v[1] for v in vertices]
-        z_coords = [v[2] for v in vertices]
+        # Project to plane with least variation (flattest; min/max and copy fused for large meshes)
+        points_2d, variations = project_flattest(vertices)
+        x_var, y_var, z_var = variations.tolist()
         
-        x_var = max(x_coords) - min(x_coords) if x_coords else 0
-        y_var = max(y_coords) - min(y_coords) if y_coords else 0
-        z_var = max(z_coords) - min(z_coords) if z_coords else 0
+        logger.debug("Variations: X=%.2f, Y=%.2f, Z=%.2f", x_var, y_var, z_var)
         
-        print(f"Variations: X={x_var:.2f}, Y={y_var:.2f}, Z={z_var:.2f}")
-        
-        # Project to plane with least variation (flattest)
-        if z_var <= x_var and z_var <= y_var:
-            # Z is most constant, use X-Y plane
-            return [(v[0], v[1]) for v in vertices]
-        elif y_var <= x_var:
-            # Y is most constant, use X-Z plane  
-            return [(v[0], v[2]) for v in vertices]
-        else:
-            # X is most constant, use Y-Z plane
-            return [(v[1], v[2]) for v in vertices]
+        return list(map(tuple, points_2d.tolist()))
     
     def extract_boundary(self, points_2d):
         """Extract outer boundary from 2D points"""
         if len(points_2d) < 3:
             return points_2d
         
-        # Remove duplicates
+        # Remove duplicates (hash on coordinates rounded to 0.001, keep the first original point)
+        seen = set()
         unique_points = []
         for p in points_2d:
-            is_duplicate = False
-            for existing in unique_points:
-                if abs(p[0] - existing[0]) < 0.001 and abs(p[1] - existing[1]) < 0.001:
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
+            key = (round(p[0], 3), round(p[1], 3))
+            if key not in seen:
+                seen.add(key)
                 unique_points.append(p)
         
         if len(unique_points) < 3:
@@ -1357,30 +1610,26 @@ class STEPProcessor:
         if len(points) < 3:
             return points
         
-        # Sort points by x coordinate
-        points = sorted(set(points))
-        if len(points) < 3:
-            return points
+        # Sort points by x coordinate (np.unique lexsorts and deduplicates in one pass)
+        pts = np.unique(np.asarray(points, dtype=np.float64).reshape(-1, 2), axis=0)
+        if len(pts) < 3:
+            return list(map(tuple, pts.tolist()))
         
-        # Build lower hull
-        lower = []
-        for p in points:
-            while len(lower) >= 2 and self.cross_product(lower[-2], lower[-1], p) <= 0:
-                lower.pop()
-            lower.append(p)
+        # Qhull when SciPy is available; collinear input falls through to the monotone chain
+        hull_indices = None
+        if HAS_SCIPY:
+            try:
+                hull_indices = ConvexHull(pts).vertices
+                # 2D hull vertices are counter-clockwise; start from the first sorted point like the chain
+                hull_indices = np.roll(hull_indices, -np.argmin(hull_indices))
+            except QhullError:
+                pass
         
-        # Build upper hull
-        upper = []
-        for p in reversed(points):
-            while len(upper) >= 2 and self.cross_product(upper[-2], upper[-1], p) <= 0:
-                upper.pop()
-            upper.append(p)
+        # Compiled monotone chain (no SciPy, or collinear input)
+        if hull_indices is None:
+            hull_indices = monotone_chain(pts)
         
-        return lower[:-1] + upper[:-1]
-    
-    def cross_product(self, o, a, b):
-        """Calculate cross product for convex hull"""
-        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+        return list(map(tuple, pts[hull_indices].tolist()))
     
     def find_holes(self, all_points, boundary):
         """Find holes inside the boundary"""
@@ -1389,11 +1638,9 @@ class STEPProcessor:
         
         holes = []
         
-        # Find points inside boundary that might form holes
-        inside_points = []
-        for point in all_points:
-            if self.point_in_polygon(point, boundary):
-                inside_points.append(point)
+        # Find points inside boundary that might form holes (one batched ray-casting pass)
+        inside = points_in_polygon(all_points, boundary).tolist()
+        inside_points = [point for point, is_inside in zip(all_points, inside) if is_inside]
         
         if len(inside_points) < 6:
             return []
@@ -1405,23 +1652,7 @@ class STEPProcessor:
     
     def point_in_polygon(self, point, polygon):
         """Check if point is inside polygon using ray casting"""
-        x, y = point
-        n = len(polygon)
-        inside = False
-        
-        p1x, p1y = polygon[0]
-        for i in range(1, n + 1):
-            p2x, p2y = polygon[i % n]
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y:
-                            xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        if p1x == p2x or x <= xinters:
-                            inside = not inside
-            p1x, p1y = p2x, p2y
-        
-        return inside
+        return bool(points_in_polygon([point], polygon)[0])
     
     def detect_circular_clusters(self, points):
         """Detect circular clusters in points"""
@@ -1429,48 +1660,47 @@ class STEPProcessor:
             return []
         
         holes = []
-        used_points = set()
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        used = np.zeros(len(pts), dtype=bool)
+        
+        # Radial neighbor queries go through a KD-tree when SciPy is available
+        tree = cKDTree(pts) if HAS_SCIPY else None
         
-        for i, center_candidate in enumerate(points):
-            if i in used_points:
+        for i in range(len(pts)):
+            if used[i]:
                 continue
             
-            cx, cy = center_candidate
+            # Find unused points at a reasonable hole-size distance from this center
+            if tree is not None:
+                candidates = np.sort(np.asarray(tree.query_ball_point(pts[i], 10.0 * (1 + 1e-9)), dtype=np.int64))
+            else:
+                candidates = np.arange(len(pts))
+            candidates = candidates[~used[candidates]]
+            delta = pts[candidates] - pts[i]
+            dist = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+            in_range = (dist >= 1.0) & (dist <= 10.0)
+            candidates, dist = candidates[in_range], dist[in_range]
+            
+            if len(dist) < 6:
+                continue
             
-            # Find points at similar distance from this center
-            distances = []
-            point_distances = []
+            # Most common distance (potential radius): the smallest d with >= 6 points within 20% of it
+            sorted_dist = np.sort(dist)
+            counts = (np.searchsorted(sorted_dist, sorted_dist + sorted_dist * 0.2, side='right')
+                      - np.searchsorted(sorted_dist, sorted_dist - sorted_dist * 0.2, side='left'))
+            matches = np.flatnonzero(counts >= 6)  # Reduce requirement for hole detection
+            if not len(matches):
+                continue
             
-            for j, (px, py) in enumerate(points):
-                if j in used_points:
-                    continue
-                dist = ((px - cx)**2 + (py - cy)**2)**0.5
-                if 1.0 <= dist <= 10.0:  # Reasonable hole size
-                    distances.append(dist)
-                    point_distances.append((j, px, py, dist))
+            d = sorted_dist[matches[0]]
+            similar = np.abs(dist - d) <= d * 0.2
             
-            if len(distances) < 6:
-                continue
+            # Mark points as used; each hole stays a contiguous (k, 2) array for the circle tests
+            used[candidates[similar]] = True
+            similar_points = pts[candidates[similar]]
             
-            # Find most common distance (potential radius)
-            distances.sort()
-            for d in distances:
-                tolerance = d * 0.2
-                similar_points = []
-                
-                for j, px, py, dist in point_distances:
-                    if abs(dist - d) <= tolerance:
-                        similar_points.append((px, py))
-                
-                if len(similar_points) >= 6:  # Reduce requirement for hole detection
-                    # Mark points as used
-                    for j, px, py, dist in point_distances:
-                        if abs(dist - d) <= tolerance:
-                            used_points.add(j)
-                    
-                    holes.append(similar_points)
-                    print(f"Found potential hole with {len(similar_points)} points at distance {d:.2f}")
-                    break
+            holes.append(similar_points)
+            logger.debug("Found potential hole with %s points at distance %.2f", len(similar_points), d)
         
         return holes
     
@@ -1480,38 +1710,73 @@ class STEPProcessor:
             return False
         
         # Calculate center and check if all points are equidistant
-        cx = sum(p[0] for p in points) / len(points)
-        cy = sum(p[1] for p in points) / len(points)
-        
-        distances = [((p[0] - cx)**2 + (p[1] - cy)**2)**0.5 for p in points]
-        avg_dist = sum(distances) / len(distances)
+        _, distances = self.radial_distances(points)
+        avg_dist = distances.mean()
         
         # Check if all distances are similar (more lenient for hole detection)
         tolerance = avg_dist * 0.25  # 25% tolerance for better detection
-        similar_count = 0
-        for dist in distances:
-            if abs(dist - avg_dist) <= tolerance:
-                similar_count += 1
+        similar_count = np.count_nonzero(np.abs(distances - avg_dist) <= tolerance)
         
         # If most points are at similar distance, consider it a circle
         return similar_count >= len(points) * 0.75  # 75% of points must be similar
     
     def get_circle_center_radius(self, points):
         """Get center and radius of circular points"""
-        cx = sum(p[0] for p in points) / len(points)
-        cy = sum(p[1] for p in points) / len(points)
-        
-        distances = [((p[0] - cx)**2 + (p[1] - cy)**2)**0.5 for p in points]
-        radius = sum(distances) / len(distances)
-        
-        return (cx, cy), radius
+        center, distances = self.radial_distances(points)
+        return tuple(center.tolist()), float(distances.mean())
+    
+    def radial_distances(self, points):
+        """Centroid of the 2D points and the distance of every point from it"""
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        center = pts.mean(axis=0)
+        return center, np.hypot(pts[:, 0] - center[0], pts[:, 1] - center[1])
     
     def get_dxf_preview_data(self, face_id):
         """Get DXF geometry data for preview (JSON format)"""
         if face_id >= len(self.face_data):
             raise Exception("Invalid face ID")
         
-        print(f"Generating DXF preview data for face {face_id}")
+        # face_data does not change once loaded, so previews are kept in a small per-session LRU;
+        # a request for a face that is already being built (e.g. by the upload warm-up) waits for it
+        face_data_list = self.face_data
+        with self._preview_lock:
+            cached = self._preview_cache.get(face_id)
+            if cached is not None:
+                self._preview_cache.move_to_end(face_id)
+                return cached
+            pending = self._preview_pending.get(face_id)
+            if pending is None:
+                pending = self._preview_pending[face_id] = Future()
+                building = True
+            else:
+                building = False
+        
+        if not building:
+            return pending.result()
+        
+        try:
+            preview_data = self._build_dxf_preview_data(face_id)
+        except Exception as e:
+            with self._preview_lock:
+                if self._preview_pending.get(face_id) is pending:
+                    del self._preview_pending[face_id]
+            pending.set_exception(e)
+            raise
+        
+        with self._preview_lock:
+            # Skip caching if the processor was reloaded while this face was being built
+            if self.face_data is face_data_list:
+                self._preview_cache[face_id] = preview_data
+                if len(self._preview_cache) > PREVIEW_CACHE_MAX_ENTRIES:
+                    self._preview_cache.popitem(last=False)
+            if self._preview_pending.get(face_id) is pending:
+                del self._preview_pending[face_id]
+        pending.set_result(preview_data)
+        return preview_data
+    
+    def _build_dxf_preview_data(self, face_id):
+        """Compute the preview geometry of one face (uncached)"""
+        logger.debug("Generating DXF preview data for face %s", face_id)
         
         # Get face data
         face_data = self.face_data[face_id]
@@ -1527,7 +1792,7 @@ class STEPProcessor:
             'entity_count': 0
         }
         
-        if not vertices or len(vertices) < 3:
+        if len(vertices) < 3:
             # Return minimal preview for empty face
             preview_data['boundary'] = {
                 'type': 'LWPOLYLINE',
@@ -1563,13 +1828,14 @@ class STEPProcessor:
         # Get boundary using the same logic as DXF creation
         boundary = self.get_preview_boundary(face_data, points_2d)
         
+        # (entity, (k, 2) array) pairs whose points are rounded together at the end
+        sections = []
+        
         if boundary and len(boundary) >= 3:
-            # Calculate dimensions
-            x_coords = [p[0] for p in boundary]
-            y_coords = [p[1] for p in boundary]
-            
-            x_min, x_max = min(x_coords), max(x_coords)
-            y_min, y_max = min(y_coords), max(y_coords)
+            # Calculate dimensions with one min/max reduction per axis
+            boundary_arr = np.asarray(boundary, dtype=np.float64)[:, :2]
+            x_min, y_min = boundary_arr.min(axis=0).tolist()
+            x_max, y_max = boundary_arr.max(axis=0).tolist()
             width = max(x_max - x_min, 0.1)  # Ensure minimum width
             height = max(y_max - y_min, 0.1)  # Ensure minimum height
             
@@ -1582,23 +1848,14 @@ class STEPProcessor:
                 }
             }
             
-            # Add boundary to preview
-            boundary_points = []
-            for p in boundary:
-                if len(p) >= 2:  # Ensure point has at least x,y coordinates
-                    boundary_points.append([round(float(p[0]), 3), round(float(p[1]), 3)])
-            
-            # Ensure we have valid points
-            if len(boundary_points) >= 3:
-                # Close the boundary if not already closed
-                if boundary_points[0] != boundary_points[-1]:
-                    boundary_points.append(boundary_points[0])
-                
+            # Add boundary to preview (points are filled in by the batched rounding below)
+            if len(boundary_arr) >= 3:
                 preview_data['boundary'] = {
                     'type': 'LWPOLYLINE',
-                    'points': boundary_points,
+                    'points': [],
                     'closed': True
                 }
+                sections.append((preview_data['boundary'], boundary_arr))
                 preview_data['entity_count'] += 1
             else:
                 # Fallback to default square
@@ -1643,52 +1900,62 @@ class STEPProcessor:
                             })
                             preview_data['entity_count'] += 1
                         else:
-                            # Add polyline hole
-                            hole_points = []
-                            for p in hole:
-                                if len(p) >= 2:
-                                    hole_points.append([round(float(p[0]), 3), round(float(p[1]), 3)])
-                            
-                            if len(hole_points) >= 3:
-                                if hole_points[0] != hole_points[-1]:
-                                    hole_points.append(hole_points[0])  # Close the hole
-                                
-                                preview_data['holes'].append({
-                                    'type': 'LWPOLYLINE',
-                                    'points': hole_points,
-                                    'closed': True
-                                })
-                                preview_data['entity_count'] += 1
+                            # Add polyline hole (points are filled in by the batched rounding below)
+                            hole_entity = {
+                                'type': 'LWPOLYLINE',
+                                'points': [],
+                                'closed': True
+                            }
+                            preview_data['holes'].append(hole_entity)
+                            sections.append((hole_entity, hole))
+                            preview_data['entity_count'] += 1
             except Exception as e:
-                print(f"Error detecting holes: {e}")
+                logger.warning("Error detecting holes: %s", e)
                 # Continue without holes
         
-        print(f"Preview data: {preview_data['entity_count']} entities, {len(preview_data['holes'])} holes")
+        # Round the boundary and every polyline hole with one np.round, then slice the sections back out
+        if sections:
+            offsets = np.cumsum([0] + [len(points) for _, points in sections]).tolist()
+            rounded = np.round(np.concatenate([points for _, points in sections]), 3).tolist()
+            for (entity, _), start, stop in zip(sections, offsets, offsets[1:]):
+                entity_points = rounded[start:stop]
+                if entity_points[0] != entity_points[-1]:
+                    entity_points.append(entity_points[0])  # Close the polyline
+                entity['points'] = entity_points
+        
+        logger.debug("Preview data: %s entities, %s holes", preview_data['entity_count'], len(preview_data['holes']))
         return preview_data
     
+    def get_face_info_json(self, face_id):
+        """Encoded JSON of face_data[face_id], kept in an LRU bounded like the preview cache"""
+        face_data_list = self.face_data
+        with self._preview_lock:
+            blob = self._face_info_cache.get(face_id)
+            if blob is not None:
+                self._face_info_cache.move_to_end(face_id)
+                return blob
+        
+        # The blob embeds the whole mesh, so encode outside the lock
+        blob = json_bytes(face_data_list[face_id])
+        with self._preview_lock:
+            if self.face_data is face_data_list:
+                self._face_info_cache[face_id] = blob
+                if len(self._face_info_cache) > PREVIEW_CACHE_MAX_ENTRIES:
+                    self._face_info_cache.popitem(last=False)
+        return blob
+    
+    def get_preview_batch(self, face_ids):
+        """DXF previews for several faces, keyed by face ID (cached previews are reused)"""
+        return {face_id: self.get_dxf_preview_data(face_id) for face_id in face_ids}
+    
     def get_preview_boundary(self, face_data, points_2d):
         """Get boundary for preview using same logic as DXF creation"""
         mesh = face_data['mesh']
         triangles = mesh.get('triangles', [])
         
-        if triangles and len(points_2d) > 3:
-            # Use edge-based boundary detection
-            boundary_edges = []
-            edge_count = {}
-            
-            for triangle in triangles:
-                edges = [
-                    (min(triangle[0], triangle[1]), max(triangle[0], triangle[1])),
-                    (min(triangle[1], triangle[2]), max(triangle[1], triangle[2])),
-                    (min(triangle[2], triangle[0]), max(triangle[2], triangle[0]))
-                ]
-                for edge in edges:
-                    edge_count[edge] = edge_count.get(edge, 0) + 1
-            
-            # Get boundary edges (appear only once)
-            for edge, count in edge_count.items():
-                if count == 1:
-                    boundary_edges.append(edge)
+        if len(triangles) and len(points_2d) > 3:
+            # Use edge-based boundary detection (edges that appear in only one triangle)
+            boundary_edges = find_boundary_edges(triangles).tolist()
             
             if boundary_edges:
                 boundary_path = self.edges_to_path(boundary_edges, points_2d)
@@ -1702,65 +1969,68 @@ class STEPProcessor:
     def extract_face_geometry(self, face):
         """Extract boundary and holes from face using pythonocc"""
         try:
-            from OCC.Core.BRepTools import BRepTools_WireExplorer
-            from OCC.Core.BRep import BRep_Tool
-            from OCC.Core.TopExp import TopExp_Explorer
-            from OCC.Core.TopAbs import TopAbs_WIRE
-            
-            print("Starting face geometry extraction...")
+            logger.debug("Starting face geometry extraction...")
             
             # Check if face is valid
             if not face:
                 raise Exception("Face is None")
             
             # Get outer wire
-            print("Getting outer wire...")
+            logger.debug("Getting outer wire...")
             outer_wire = BRep_Tool.OuterWire(face)
             if not outer_wire:
                 raise Exception("Could not get outer wire")
                 
-            print("Extracting boundary points...")
+            logger.debug("Extracting boundary points...")
             boundary_points = self.extract_wire_points(outer_wire)
-            print(f"Got {len(boundary_points)} boundary points")
+            logger.debug("Got %s boundary points", len(boundary_points))
             
-            # Get holes (inner wires)
-            holes = []
-            print("Looking for holes...")
+            # Collect all wires in one explorer pass
+            wires = []
             wire_explorer = TopExp_Explorer(face, TopAbs_WIRE)
-            wire_count = 0
             while wire_explorer.More():
-                wire = wire_explorer.Current()
-                wire_count += 1
-                print(f"Processing wire {wire_count}")
+                wires.append(wire_explorer.Current())
+                wire_explorer.Next()
+            
+            # Tag the outer wire by index; IsSame stops being called once it is found
+            outer_index = next((i for i, wire in enumerate(wires) if wire.IsSame(outer_wire)), None)
+            
+            # Get holes (inner wires)
+            holes = []
+            logger.debug("Looking for holes...")
+            for wire_index, wire in enumerate(wires):
+                wire_count = wire_index + 1
+                logger.debug("Processing wire %s", wire_count)
                 
-                if not wire.IsSame(outer_wire):
-                    print(f"Found hole wire {wire_count}")
+                if wire_index != outer_index:
+                    logger.debug("Found hole wire %s", wire_count)
                     hole_points = self.extract_wire_points(wire)
                     if hole_points:
                         holes.append(hole_points)
-                        print(f"Added hole with {len(hole_points)} points")
-                wire_explorer.Next()
+                        logger.debug("Added hole with %s points", len(hole_points))
             
-            print(f"Final result: {len(boundary_points)} boundary points, {len(holes)} holes")
+            logger.debug("Final result: %s boundary points, %s holes", len(boundary_points), len(holes))
             return boundary_points, holes
             
         except Exception as e:
-            import traceback
-            print(f"Error extracting face geometry: {e}")
-            traceback.print_exc()
+            logger.exception("Error extracting face geometry: %s", e)
             return [], []
     
     def extract_wire_points(self, wire):
         """Extract points from a wire with enhanced geometric analysis"""
         try:
-            from OCC.Core.BRepTools import BRepTools_WireExplorer
-            from OCC.Core.BRep import BRep_Tool
-            from OCC.Core.GeomAbs import GeomAbs_Line, GeomAbs_Circle, GeomAbs_Ellipse
-            from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
-            
-            points = []
+            chunks = []
             wire_explorer = BRepTools_WireExplorer(wire)
             
+            def sample(curve, params):
+                # Fill a preallocated (N, 3) buffer; curve.Value is the only per-point call
+                out = np.empty((len(params), 3), dtype=np.float64)
+                for i, point in enumerate(map(curve.Value, params.tolist())):
+                    out[i, 0] = point.X()
+                    out[i, 1] = point.Y()
+                    out[i, 2] = point.Z()
+                return out
+            
             while wire_explorer.More():
                 edge = wire_explorer.Current()
                 try:
@@ -1772,54 +2042,36 @@ class STEPProcessor:
                     if curve:
                         if curve_type == GeomAbs_Line:
                             # For lines, take start and end points
-                            start_point = curve.Value(first)
-                            end_point = curve.Value(last)
-                            points.append([start_point.X(), start_point.Y(), start_point.Z()])
-                            points.append([end_point.X(), end_point.Y(), end_point.Z()])
+                            params = np.array([first, last])
                         elif curve_type == GeomAbs_Circle:
                             # For circles/arcs, take sufficient points for smooth curves
-                            num_samples = 16  # Increased for better circle approximation
-                            for i in range(num_samples):
-                                param = first + (last - first) * i / num_samples
-                                point = curve.Value(param)
-                                points.append([point.X(), point.Y(), point.Z()])
+                            params = np.linspace(first, last, 16, endpoint=False)  # Increased for better circle approximation
                         elif curve_type == GeomAbs_Ellipse:
                             # For ellipses, take more points for accurate representation
-                            num_samples = 12
-                            for i in range(num_samples):
-                                param = first + (last - first) * i / num_samples
-                                point = curve.Value(param)
-                                points.append([point.X(), point.Y(), point.Z()])
+                            params = np.linspace(first, last, 12, endpoint=False)
                         else:
                             # For other curves (splines, etc.), dense sampling
-                            num_samples = 10
-                            for i in range(num_samples):
-                                param = first + (last - first) * i / (num_samples - 1) if num_samples > 1 else first
-                                point = curve.Value(param)
-                                points.append([point.X(), point.Y(), point.Z()])
+                            params = np.linspace(first, last, 10)
+                        chunks.append(sample(curve, params))
                 except Exception as edge_error:
-                    print(f"Error processing edge: {edge_error}")
+                    logger.warning("Error processing edge: %s", edge_error)
                     pass
                 wire_explorer.Next()
             
-            # Remove duplicate points
-            unique_points = []
-            for point in points:
-                is_duplicate = False
-                for existing in unique_points:
-                    if (abs(point[0] - existing[0]) < 0.001 and 
-                        abs(point[1] - existing[1]) < 0.001 and 
-                        abs(point[2] - existing[2]) < 0.001):
-                        is_duplicate = True
-                        break
-                if not is_duplicate:
-                    unique_points.append(point)
-            
-            print(f"Extracted {len(unique_points)} unique points from wire")
+            if not chunks:
+                return []
+            
+            # Remove duplicate points (coordinates rounded to 0.001, keep the first original point in wire order)
+            points = np.concatenate(chunks)
+            keys = np.round(points, 3) + 0.0  # + 0.0 folds -0.0 into 0.0
+            first_index = np.unique(keys, axis=0, return_index=True)[1]
+            unique_points = points[np.sort(first_index)].tolist()
+            
+            logger.debug("Extracted %s unique points from wire", len(unique_points))
             return unique_points
             
         except Exception as e:
-            print(f"Error extracting wire points: {e}")
+            logger.warning("Error extracting wire points: %s", e)
             return []
     
     
@@ -1827,182 +2079,254 @@ class STEPProcessor:
     
     def create_test_dxf(self):
         """Create a simple test DXF file to verify the workflow"""
-        doc = ezdxf.new('R2010')
-        doc.units = ezdxf.units.MM
-        msp = doc.modelspace()
-        
-        # Create basic layers
-        doc.layers.new('GEOMETRY', dxfattribs={'color': 1})
-        doc.layers.new('TEXT', dxfattribs={'color': 3})
-        doc.layers.new('CONSTRUCTION', dxfattribs={'color': 8})
-        
-        # Add simple, guaranteed visible geometry
-        # Square at origin
-        square = [(-25, -25), (25, -25), (25, 25), (-25, 25), (-25, -25)]
-        msp.add_lwpolyline(square, close=True, dxfattribs={'layer': 'GEOMETRY', 'color': 1})
-        
-        # Circle
-        msp.add_circle((0, 0), 15, dxfattribs={'layer': 'GEOMETRY', 'color': 1})
-        
-        # Construction lines
-        msp.add_line((-50, 0), (50, 0), dxfattribs={'layer': 'CONSTRUCTION', 'color': 8})
-        msp.add_line((0, -50), (0, 50), dxfattribs={'layer': 'CONSTRUCTION', 'color': 8})
-        
-        # Text
-        msp.add_text(
-            "TEST DXF - If you can see this, DXF export is working",
-            dxfattribs={
-                'height': 3.0,
-                'layer': 'TEXT',
-                'insert': (0, -40),
-                'halign': 1,
-                'valign': 1,
-                'color': 3
-            }
-        )
-        
-        # Version info
-        msp.add_text(
-            "Generated by STEP to DXF Webapp v1.1",
-            dxfattribs={
-                'height': 2.0,
-                'layer': 'TEXT', 
-                'insert': (0, 35),
-                'halign': 1,
-                'valign': 1,
-                'color': 3
-            }
-        )
-        
-        # Force extents
-        try:
-            doc.header['$EXTMIN'] = (-60, -60, 0)
-            doc.header['$EXTMAX'] = (60, 60, 0)
-            doc.header['$LIMMIN'] = (-60, -60)
-            doc.header['$LIMMAX'] = (60, 60)
-        except:
-            pass
-        
-        # Save file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.dxf')
-        try:
-            doc.saveas(temp_file.name)
-            temp_file.close()
-            return temp_file.name, 6  # 6 entities created
-        except Exception as e:
-            temp_file.close()
-            raise Exception(f"Failed to create test DXF: {str(e)}")
+        return build_test_dxf(), 6  # 6 entities created
     
     def create_guaranteed_dxf(self, face_id):
         """Create a guaranteed-to-work DXF with basic geometry"""
-        print(f"Creating guaranteed DXF for face {face_id}")
-        
-        # Create DXF document
-        doc = ezdxf.new('R2010')
-        doc.units = ezdxf.units.MM
-        msp = doc.modelspace()
-        
-        # Create basic layers
-        doc.layers.new('OUTLINE', dxfattribs={'color': 1, 'lineweight': 50})
-        doc.layers.new('TEXT', dxfattribs={'color': 3, 'lineweight': 25})
-        doc.layers.new('REFERENCE', dxfattribs={'color': 8, 'lineweight': 25})
+        logger.debug("Creating guaranteed DXF for face %s", face_id)
         
         # Get face info if available
         face_type = "Unknown"
         if face_id < len(self.face_data):
             face_type = self.face_data[face_id].get('type', 'Unknown')
         
-        # Create guaranteed visible geometry - square outline
-        square_size = 20.0
-        square_points = [
-            (-square_size, -square_size),
-            (square_size, -square_size), 
-            (square_size, square_size),
-            (-square_size, square_size)
-        ]
-        
-        # Add main outline
-        msp.add_lwpolyline(
-            square_points, 
-            close=True, 
-            dxfattribs={
-                'layer': 'OUTLINE',
-                'color': 1,
-                'lineweight': 50
-            }
-        )
-        print("Added main outline square")
-        
-        # Add inner geometry for visual interest
-        inner_size = square_size * 0.6
-        inner_circle = msp.add_circle(
-            (0, 0), 
-            inner_size, 
-            dxfattribs={
-                'layer': 'OUTLINE',
-                'color': 1,
-                'lineweight': 35
-            }
-        )
-        print("Added inner circle")
-        
-        # Add reference lines
-        axis_length = square_size * 1.2
-        msp.add_line((-axis_length, 0), (axis_length, 0), dxfattribs={'layer': 'REFERENCE', 'color': 8})
-        msp.add_line((0, -axis_length), (0, axis_length), dxfattribs={'layer': 'REFERENCE', 'color': 8})
-        print("Added reference axes")
-        
-        # Add informational text
-        text_height = 3.0
-        
-        main_text = f"Face {face_id + 1} - {face_type}"
-        msp.add_text(
-            main_text,
-            dxfattribs={
-                'height': text_height,
-                'layer': 'TEXT',
-                'insert': (0, square_size + 5),
-                'halign': 1,  # Center
-                'valign': 0,  # Baseline
-                'color': 3
-            }
-        )
-        
-        info_text = "Guaranteed geometry - DXF export working"
-        msp.add_text(
-            info_text,
-            dxfattribs={
-                'height': text_height * 0.7,
-                'layer': 'TEXT',
-                'insert': (0, -square_size - 8),
-                'halign': 1,
-                'valign': 0,
-                'color': 3
-            }
-        )
-        
-        print("Added text labels")
-        
-        # Set proper document extents
-        extent = square_size + 15
-        doc.header['$EXTMIN'] = (-extent, -extent, 0)
-        doc.header['$EXTMAX'] = (extent, extent, 0)
-        doc.header['$LIMMIN'] = (-extent, -extent)
-        doc.header['$LIMMAX'] = (extent, extent)
-        
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.dxf')
-        try:
-            doc.saveas(temp_file.name)
-            temp_file.close()
-            print(f"Guaranteed DXF saved to {temp_file.name}")
-            return temp_file.name, 5  # 5 entities guaranteed
-        except Exception as save_error:
-            temp_file.close()
-            raise Exception(f"Failed to save guaranteed DXF: {str(save_error)}")
+        # Only the label differs between faces, so substitute it into the cached bytes
+        label = f"Face {face_id + 1} - {face_type}"
+        dxf_bytes = build_guaranteed_dxf_template().replace(GUARANTEED_DXF_LABEL.encode(), label.encode('utf-8'))
+        logger.debug("Guaranteed DXF created (%s bytes)", len(dxf_bytes))
+        return dxf_bytes, 5  # 5 entities guaranteed
+
+@lru_cache(maxsize=None)
+def build_test_dxf():
+    """Build the fixed test DXF once; later calls return the same bytes"""
+    doc = ezdxf.new('R2010')
+    doc.units = ezdxf.units.MM
+    msp = doc.modelspace()
+    
+    # Create basic layers
+    doc.layers.new('GEOMETRY', dxfattribs={'color': 1})
+    doc.layers.new('TEXT', dxfattribs={'color': 3})
+    doc.layers.new('CONSTRUCTION', dxfattribs={'color': 8})
+    
+    # Add simple, guaranteed visible geometry
+    # Square at origin
+    square = [(-25, -25), (25, -25), (25, 25), (-25, 25), (-25, -25)]
+    msp.add_lwpolyline(square, close=True, dxfattribs={'layer': 'GEOMETRY', 'color': 1})
+    
+    # Circle
+    msp.add_circle((0, 0), 15, dxfattribs={'layer': 'GEOMETRY', 'color': 1})
+    
+    # Construction lines
+    msp.add_line((-50, 0), (50, 0), dxfattribs={'layer': 'CONSTRUCTION', 'color': 8})
+    msp.add_line((0, -50), (0, 50), dxfattribs={'layer': 'CONSTRUCTION', 'color': 8})
+    
+    # Text
+    msp.add_text(
+        "TEST DXF - If you can see this, DXF export is working",
+        dxfattribs={
+            'height': 3.0,
+            'layer': 'TEXT',
+            'insert': (0, -40),
+            'halign': 1,
+            'valign': 1,
+            'color': 3
+        }
+    )
+    
+    # Version info
+    msp.add_text(
+        "Generated by STEP to DXF Webapp v1.1",
+        dxfattribs={
+            'height': 2.0,
+            'layer': 'TEXT', 
+            'insert': (0, 35),
+            'halign': 1,
+            'valign': 1,
+            'color': 3
+        }
+    )
     
+    # Force extents
+    try:
+        doc.header['$EXTMIN'] = (-60, -60, 0)
+        doc.header['$EXTMAX'] = (60, 60, 0)
+        doc.header['$LIMMIN'] = (-60, -60)
+        doc.header['$LIMMAX'] = (60, 60)
+    except:
+        pass
     
+    # Serialize in memory
+    try:
+        return dxf_to_bytes(doc)
+    except Exception as e:
+        raise Exception(f"Failed to create test DXF: {str(e)}")
 
+@lru_cache(maxsize=None)
+def build_guaranteed_dxf_template():
+    """Build the guaranteed DXF once with a placeholder where the face label goes"""
+    # Create DXF document
+    doc = ezdxf.new('R2010')
+    doc.units = ezdxf.units.MM
+    msp = doc.modelspace()
+    
+    # Create basic layers
+    doc.layers.new('OUTLINE', dxfattribs={'color': 1, 'lineweight': 50})
+    doc.layers.new('TEXT', dxfattribs={'color': 3, 'lineweight': 25})
+    doc.layers.new('REFERENCE', dxfattribs={'color': 8, 'lineweight': 25})
+    
+    # Create guaranteed visible geometry - square outline
+    square_size = 20.0
+    square_points = [
+        (-square_size, -square_size),
+        (square_size, -square_size), 
+        (square_size, square_size),
+        (-square_size, square_size)
+    ]
+    
+    # Add main outline
+    msp.add_lwpolyline(
+        square_points, 
+        close=True, 
+        dxfattribs={
+            'layer': 'OUTLINE',
+            'color': 1,
+            'lineweight': 50
+        }
+    )
+    logger.debug("Added main outline square")
+    
+    # Add inner geometry for visual interest
+    inner_size = square_size * 0.6
+    inner_circle = msp.add_circle(
+        (0, 0), 
+        inner_size, 
+        dxfattribs={
+            'layer': 'OUTLINE',
+            'color': 1,
+            'lineweight': 35
+        }
+    )
+    logger.debug("Added inner circle")
+    
+    # Add reference lines
+    axis_length = square_size * 1.2
+    msp.add_line((-axis_length, 0), (axis_length, 0), dxfattribs={'layer': 'REFERENCE', 'color': 8})
+    msp.add_line((0, -axis_length), (0, axis_length), dxfattribs={'layer': 'REFERENCE', 'color': 8})
+    logger.debug("Added reference axes")
+    
+    # Add informational text
+    text_height = 3.0
+    
+    main_text = GUARANTEED_DXF_LABEL
+    msp.add_text(
+        main_text,
+        dxfattribs={
+            'height': text_height,
+            'layer': 'TEXT',
+            'insert': (0, square_size + 5),
+            'halign': 1,  # Center
+            'valign': 0,  # Baseline
+            'color': 3
+        }
+    )
+    
+    info_text = "Guaranteed geometry - DXF export working"
+    msp.add_text(
+        info_text,
+        dxfattribs={
+            'height': text_height * 0.7,
+            'layer': 'TEXT',
+            'insert': (0, -square_size - 8),
+            'halign': 1,
+            'valign': 0,
+            'color': 3
+        }
+    )
+    
+    logger.debug("Added text labels")
+    
+    # Set proper document extents
+    extent = square_size + 15
+    doc.header['$EXTMIN'] = (-extent, -extent, 0)
+    doc.header['$EXTMAX'] = (extent, extent, 0)
+    doc.header['$LIMMIN'] = (-extent, -extent)
+    doc.header['$LIMMAX'] = (extent, extent)
+    
+    # Serialize in memory
+    try:
+        return dxf_to_bytes(doc)
+    except Exception as save_error:
+        raise Exception(f"Failed to save guaranteed DXF: {str(save_error)}")
+
+# Single background thread that fills preview caches after uploads
+_preview_warmup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='preview-warmup')
+
+def warm_previews(processor):
+    """Precompute DXF previews for as many faces as the preview cache holds"""
+    face_ids = range(min(len(processor.face_data), PREVIEW_CACHE_MAX_ENTRIES))
+    try:
+        processor.get_preview_batch(face_ids)
+    except Exception as e:
+        # Previews that failed here are rebuilt (and report their error) on demand
+        logger.debug("Preview warm-up stopped: %s", e)
+
+_load_executor = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix='step-load')
+_load_slots = threading.BoundedSemaphore(LOAD_QUEUE_MAX)  # One per queued or running load job
+
+def discard_upload_file(temp_file):
+    """Close and remove an upload temp file that no load job is going to read"""
+    temp_file.close()
+    if not PROC_FD_DIR:
+        try:
+            os.unlink(temp_file.name)
+        except OSError:
+            pass
+
+def finish_load_job(job, temp_file):
+    """Done callback of a load job: free its queue slot, and drop the upload if the job was cancelled"""
+    _load_slots.release()
+    if job.cancelled():
+        discard_upload_file(temp_file)
+
+def load_session(session, temp_file):
+    """Load an uploaded STEP file into a new processor for the session (runs on _load_executor)"""
+    processor = STEPProcessor()
+    if PROC_FD_DIR:
+        # Closing the NamedTemporaryFile removes it, even if loading fails
+        with temp_file:
+            result = processor.load_step_file(f"{PROC_FD_DIR}/{temp_file.fileno()}")
+    else:
+        try:
+            result = processor.load_step_file(temp_file.name)
+        finally:
+            os.unlink(temp_file.name)
+    logger.debug("Processing result: %s", result)
+    session['processor'] = processor
+    
+    if PREVIEW_WARMUP:
+        _preview_warmup_executor.submit(warm_previews, processor)
+    return result
+
+def get_session_state(session_id):
+    """Look up a session and the state of its load job; returns (session or None, state payload, HTTP status)"""
+    if not SESSION_ID_RE.match(session_id):
+        return None, {'error': 'Invalid session ID'}, 400
+    session = sessions.get(session_id)
+    if session is None:
+        return None, {'error': 'Session not found'}, 404
+    job = session['job']
+    if not job.done():
+        return session, {'session_id': session_id, 'status': 'processing', 'error': 'STEP file is still being processed'}, 425
+    if job.exception() is not None:
+        return session, {'session_id': session_id, 'status': 'error', 'error': str(job.exception())}, 500
+    return session, {'session_id': session_id, 'status': 'done'}, 200
+
+def get_loaded_session(session_id):
+    """Look up a session whose STEP file has finished loading; returns (session, error response)"""
+    session, state, status = get_session_state(session_id)
+    if status != 200:
+        return None, json_response(state, status)
+    return session, None
 
 @app.route('/')
 def index():
@@ -2014,7 +2338,7 @@ def health_check():
     """Health check endpoint"""
     try:
         import sys
-        return jsonify({
+        return json_response({
             'status': 'ok',
             'pythonocc_available': HAS_PYTHONOCC,
             'ezdxf_available': HAS_EZDXF,
@@ -2022,12 +2346,12 @@ def health_check():
             'flask_version': getattr(Flask, '__version__', 'unknown')
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             'status': 'error',
             'error': str(e),
             'pythonocc_available': HAS_PYTHONOCC,
             'ezdxf_available': HAS_EZDXF
-        }), 500
+        }, 500)
 
 @app.route('/api/debug')
 def debug_info():
@@ -2042,7 +2366,7 @@ def debug_info():
             except Exception as import_error:
                 reader_test = f"❌ Import error: {str(import_error)}"
         
-        return jsonify({
+        return json_response({
             'pythonocc_status': reader_test,
             'pythonocc_available': HAS_PYTHONOCC,
             'ezdxf_status': "✅ Available" if HAS_EZDXF else "❌ Not available",
@@ -2052,188 +2376,261 @@ def debug_info():
         })
     except Exception as e:
         import traceback
-        return jsonify({
+        return json_response({
             'error': str(e),
             'traceback': traceback.format_exc(),
             'pythonocc_available': HAS_PYTHONOCC,
             'ezdxf_available': HAS_EZDXF
-        }), 500
+        }, 500)
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    """Reject oversized uploads from the Content-Length header, before any of the body is spooled"""
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return json_response({'error': f'File too large (maximum {limit_mb}MB)'}, 413)
 
 @app.route('/api/upload', methods=['POST'])
 def upload_step_file():
     """Upload and process STEP file"""
     try:
-        print("Upload request received")
+        logger.debug("Upload request received")
         
         if 'file' not in request.files:
-            print("No file in request")
-            return jsonify({'error': 'No file provided'}), 400
+            logger.debug("No file in request")
+            return json_response({'error': 'No file provided'}, 400)
         
         file = request.files['file']
-        print(f"File received: {file.filename}")
+        logger.debug("File received: %s", file.filename)
         
         if file.filename == '':
-            print("Empty filename")
-            return jsonify({'error': 'No file selected'}), 400
+            logger.debug("Empty filename")
+            return json_response({'error': 'No file selected'}, 400)
         
         if not file.filename.lower().endswith(('.step', '.stp')):
-            print(f"Invalid file type: {file.filename}")
-            return jsonify({'error': 'Only STEP files (.step, .stp) are allowed'}), 400
+            logger.debug("Invalid file type: %s", file.filename)
+            return json_response({'error': 'Only STEP files (.step, .stp) are allowed'}, 400)
+        
+        # Reject non-STEP payloads before writing anything to disk or starting OCC
+        file.stream.seek(0)
+        head = file.stream.read(STEP_MAGIC_PEEK_BYTES)
+        if b'ISO-10303' not in head:
+            logger.debug("Missing ISO-10303 header: %s", file.filename)
+            return json_response({'error': 'File is not a valid STEP (ISO-10303) file'}, 400)
+        
+        # Refuse the upload while the load queue is full; the slot is freed when its load job is done
+        if not _load_slots.acquire(blocking=False):
+            response = json_response({'error': 'Too many STEP files are being processed, please retry shortly'}, 503)
+            response.headers['Retry-After'] = '5'
+            return response
         
-        # Process STEP file directly from memory
         session_id = str(uuid.uuid4())
         filename = secure_filename(file.filename)
-        print(f"Processing STEP file directly from memory: {filename}")
-        
-        # Create temporary file for processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.step') as temp_file:
-            # Write file content directly to temporary file
-            file.seek(0)  # Reset file pointer to beginning
-            temp_file.write(file.read())
-            temp_file.flush()  # Ensure content is written to disk
-            temp_file_path = temp_file.name
+        logger.debug("Processing STEP file: %s", filename)
         
+        # Stream the upload into a temporary file for processing (RAM-backed when UPLOAD_TMP_DIR is tmpfs);
+        # the load job takes ownership of it and removes it once OCC has read it
+        temp_file = tempfile.NamedTemporaryFile(suffix='.step', dir=UPLOAD_TMP_DIR, delete=PROC_FD_DIR is not None)
+        cache_dir = None
         try:
-            processor = STEPProcessor()
-            result = processor.load_step_file(temp_file_path)
-            print(f"Processing result: {result}")
-            
-            # Store session data (without file_path since we're not keeping it)
-            sessions[session_id] = {
-                'processor': processor,
-                'filename': filename
-            }
+            temp_file.write(head)
+            shutil.copyfileobj(file.stream, temp_file, length=UPLOAD_COPY_BUFFER_SIZE)
+            temp_file.flush()
+            if not PROC_FD_DIR:
+                temp_file.close()
             
-        finally:
-            # Clean up temporary file immediately after processing
-            try:
-                os.unlink(temp_file_path)
-                print(f"Temporary file {temp_file_path} deleted")
-            except OSError:
-                pass
-        
-        result['session_id'] = session_id
-        print(f"Returning result: {result}")
-        return jsonify(result)
-        
+            # Store session data (without file_path since we're not keeping it); the processor is filled in
+            # by the load job, and exports are materialized lazily into a per-session cache directory
+            cache_dir = tempfile.mkdtemp(prefix='step_to_dxf_export_', dir=EXPORT_CACHE_DIR)
+            os.chmod(cache_dir, EXPORT_DIR_MODE)
+            session = {
+                'processor': None,
+                'filename': filename,
+                'cache_dir': cache_dir
+            }
+            session['job'] = _load_executor.submit(load_session, session, temp_file)
+        except Exception:
+            # Until the job is queued nothing else owns the queue slot, the temp file or the cache directory
+            _load_slots.release()
+            discard_upload_file(temp_file)
+            if cache_dir is not None:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            raise
+        session['job'].add_done_callback(lambda job: finish_load_job(job, temp_file))
+        sessions[session_id] = session
+        
+        # The client polls /api/job-status/<session_id> for the face data
+        return json_response({'session_id': session_id, 'status': 'processing'}, 202)
+        
+    except RequestEntityTooLarge:
+        raise  # Handled by upload_too_large
     except Exception as e:
-        print(f"Upload error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+        logger.exception("Upload error: %s", e)
+        return json_response({'error': str(e)}, 500)
+
+@app.route('/api/job-status/<session_id>')
+def job_status(session_id):
+    """Poll the STEP load started by /api/upload; returns the face data once it is done"""
+    session, state, status = get_session_state(session_id)
+    if status != 200:
+        return json_response(state, status)
+    
+    result = dict(session['job'].result(), **state)
+    logger.debug("Returning result: %s", result)
+    return json_response(result)
 
 @app.route('/api/export-face/<session_id>/<int:face_id>')
 def export_face(session_id, face_id):
     """Export selected face to DXF or SVG"""
-    if session_id not in sessions:
-        return jsonify({'error': 'Session not found'}), 404
+    # Snapshot the session once; the store's lock is not held while OCC works on it
+    session, error_response = get_loaded_session(session_id)
+    if error_response is not None:
+        return error_response
     
     # Get format parameter (default to DXF)
     format_type = request.args.get('format', 'dxf').lower()
     
     try:
-        processor = sessions[session_id]['processor']
-        
-        if format_type == 'svg':
-            export_file = processor.export_face_to_svg(face_id)
-            filename = sessions[session_id]['filename']
-            base_name = os.path.splitext(filename)[0]
-            download_name = f"{base_name}_face_{face_id + 1}.svg"
-            mimetype = 'image/svg+xml'
-        else:
-            export_file, line_count = processor.export_face_to_dxf(face_id)
-            filename = sessions[session_id]['filename']
-            base_name = os.path.splitext(filename)[0]
-            download_name = f"{base_name}_face_{face_id + 1}.dxf"
-            mimetype = 'application/octet-stream'
-
-        @after_this_request
-        def remove_file(response):
-            try:
-                os.remove(export_file)
-            except Exception as e:
-                print(f"Error deleting temp file: {e}")
-            return response
+        processor = session['processor']
+        extension = 'svg' if format_type == 'svg' else 'dxf'
+        export_path = os.path.join(session['cache_dir'], f"{face_id}.{extension}")
+        
+        # Generate each face/format once; later downloads are served straight from the cache directory
+        if not os.path.exists(export_path):
+            if extension == 'svg':
+                export_data = processor.export_face_to_svg(face_id)
+            else:
+                export_data, line_count = processor.export_face_to_dxf(face_id)
+            
+            # DXF/SVG text compresses well: keep a gzipped copy beside the plain file.
+            # The plain file is written last, so its presence means both are complete
+            write_file_atomic(export_path + '.gz', gzip.compress(export_data, compresslevel=6, mtime=0), EXPORT_FILE_MODE)
+            write_file_atomic(export_path, export_data, EXPORT_FILE_MODE)
+        
+        base_name = os.path.splitext(session['filename'])[0]
+        download_name = f"{base_name}_face_{face_id + 1}.{extension}"
+        mimetype = 'image/svg+xml' if extension == 'svg' else 'application/octet-stream'
+        
+        # Behind X-Accel-Redirect nginx drops Content-Encoding, so it is always pointed at the plain file;
+        # with "gzip_static on;" in the internal location nginx negotiates the .gz copy itself
+        accel_redirect = bool(EXPORT_ACCEL_PREFIX and EXPORT_CACHE_DIR)
+        use_gzip = not accel_redirect and request.accept_encodings['gzip'] > 0
+        served_path = export_path + '.gz' if use_gzip else export_path
 
-        return send_file(
-            export_file,
+        response = send_file(
+            served_path,
             as_attachment=True,
             download_name=download_name,
-            mimetype=mimetype
+            mimetype=mimetype,
+            conditional=True
         )
+        response.vary.add('Accept-Encoding')
+        if use_gzip:
+            response.content_encoding = 'gzip'
+        if accel_redirect:
+            # nginx serves the body itself from the internal location aliased to EXPORT_CACHE_DIR
+            relative_path = os.path.relpath(served_path, EXPORT_CACHE_DIR).replace(os.sep, '/')
+            response.headers['X-Accel-Redirect'] = EXPORT_ACCEL_PREFIX.rstrip('/') + '/' + relative_path
+            response.close()
+            response.set_data(b'')
+        return response
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @app.route('/api/face-info/<session_id>/<int:face_id>')
 def get_face_info(session_id, face_id):
     """Get detailed information about a specific face"""
-    if session_id not in sessions:
-        return jsonify({'error': 'Session not found'}), 404
+    session, error_response = get_loaded_session(session_id)
+    if error_response is not None:
+        return error_response
     
     try:
-        processor = sessions[session_id]['processor']
+        processor = session['processor']
         
         if face_id >= len(processor.face_data):
-            return jsonify({'error': 'Invalid face ID'}), 400
+            return json_response({'error': 'Invalid face ID'}, 400)
         
-        face_info = processor.face_data[face_id]
-        return jsonify(face_info)
+        # Face data never changes within a session, so the encoded JSON is reused
+        return app.response_class(processor.get_face_info_json(face_id), mimetype='application/json')
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
+
+# Library availability is fixed at import time; only the session count is spliced in per request
+_STATUS_BLOB_PREFIX = json_bytes({'pythonocc_available': HAS_PYTHONOCC, 'ezdxf_available': HAS_EZDXF})[:-1]
 
 @app.route('/api/status')
 def get_status():
     """Get application status"""
-    return jsonify({
-        'pythonocc_available': HAS_PYTHONOCC,
-        'ezdxf_available': HAS_EZDXF,
-        'active_sessions': len(sessions)
-    })
+    return app.response_class(
+        b'%s,"active_sessions":%d}' % (_STATUS_BLOB_PREFIX, len(sessions)),
+        mimetype='application/json'
+    )
 
 @app.route('/api/preview-dxf/<session_id>/<int:face_id>')
 def preview_dxf(session_id, face_id):
     """Get DXF preview data for selected face"""
-    if session_id not in sessions:
-        return jsonify({'error': 'Session not found'}), 404
+    session, error_response = get_loaded_session(session_id)
+    if error_response is not None:
+        return error_response
     
     try:
-        processor = sessions[session_id]['processor']
+        processor = session['processor']
         preview_data = processor.get_dxf_preview_data(face_id)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'preview': preview_data
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
+
+@app.route('/api/preview-dxf-batch/<session_id>')
+def preview_dxf_batch(session_id):
+    """Get DXF preview data for several faces at once (?faces=0,1,2)"""
+    session, error_response = get_loaded_session(session_id)
+    if error_response is not None:
+        return error_response
+    
+    try:
+        processor = session['processor']
+        face_args = [face_id for face_id in request.args.get('faces', '').split(',') if face_id.strip()]
+        if len(face_args) > PREVIEW_BATCH_MAX_FACES:
+            return json_response({'error': f'Too many faces (maximum {PREVIEW_BATCH_MAX_FACES} per request)'}, 400)
+        face_ids = [int(face_id) for face_id in face_args]
+        
+        if not face_ids or any(face_id < 0 or face_id >= len(processor.face_data) for face_id in face_ids):
+            return json_response({'error': 'Invalid face ID'}, 400)
+        
+        previews = processor.get_preview_batch(face_ids)
+        
+        return json_response({
+            'success': True,
+            'previews': {str(face_id): preview for face_id, preview in previews.items()}
+        })
+        
+    except ValueError:
+        return json_response({'error': 'Invalid face ID'}, 400)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
 
 @app.route('/api/test-dxf')
 def create_test_dxf_download():
     """Create and download a test DXF file for verification"""
     try:
         processor = STEPProcessor()
-        dxf_file, entity_count = processor.create_test_dxf()
+        dxf_data, entity_count = processor.create_test_dxf()
         
-        @after_this_request
-        def remove_file(response):
-            try:
-                os.remove(dxf_file)
-            except Exception as e:
-                print(f"Error deleting temp file: {e}")
-            return response
-
         return send_file(
-            dxf_file,
+            io.BytesIO(dxf_data),
             as_attachment=True,
             download_name="test_dxf_export.dxf",
             mimetype='application/octet-stream'
         )
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 if __name__ == '__main__':
     print("=== STEP to DXF Web Application ===")
@@ -0,0 +1,426 @@
+"""
+Numeric kernels for STEP face geometry
+Compiled with Numba when available, plain NumPy otherwise
+"""
+
+import os
+
+import numpy as np
+
+try:
+    from numba import config, njit, prange, types
+    from numba.typed import Dict
+    BUCKET_KEY_TYPE = types.UniTuple(types.int64, 2)
+    HAS_NUMBA = True
+    # Parallel kernels are called from request/worker threads; TBB hangs at interpreter exit
+    # when first started off the main thread, so prefer OpenMP unless configured explicitly
+    if 'NUMBA_THREADING_LAYER' not in os.environ and 'NUMBA_THREADING_LAYER_PRIORITY' not in os.environ:
+        config.THREADING_LAYER_PRIORITY = ['omp', 'tbb', 'workqueue']
+except ImportError:
+    HAS_NUMBA = False
+
+def _compute_arc_centers_loop(starts, ends, radius):
+    """Loop form of compute_arc_centers for Numba (float64 arrays only)"""
+    centers = np.empty((2 * starts.shape[0], 2), dtype=np.float64)
+    count = 0
+
+    for i in range(starts.shape[0]):
+        dx = ends[i, 0] - starts[i, 0]
+        dy = ends[i, 1] - starts[i, 1]
+
+        # Only chords shorter than the diameter define a center
+        chord_half = np.hypot(dx, dy) / 2
+        if chord_half >= radius:
+            continue
+
+        # Midpoint of chord and distance from midpoint to center
+        mid_x = (starts[i, 0] + ends[i, 0]) / 2
+        mid_y = (starts[i, 1] + ends[i, 1]) / 2
+        center_distance = np.sqrt(radius**2 - chord_half**2)
+
+        # Perpendicular direction (fixed X direction for near-vertical chords)
+        if abs(dx) > 0.001:
+            perp_x, perp_y = -dy, dx
+        else:
+            perp_x, perp_y = 1.0, 0.0
+
+        perp_length = np.hypot(perp_x, perp_y)
+        if perp_length > 0:
+            perp_x /= perp_length
+            perp_y /= perp_length
+
+        # Two possible centers per arc, kept next to each other
+        centers[count, 0] = mid_x + perp_x * center_distance
+        centers[count, 1] = mid_y + perp_y * center_distance
+        centers[count + 1, 0] = mid_x - perp_x * center_distance
+        centers[count + 1, 1] = mid_y - perp_y * center_distance
+        count += 2
+
+    return centers[:count]
+
+def _compute_arc_centers_numpy(starts, ends, radius):
+    """Vectorized form of compute_arc_centers"""
+    delta = ends - starts
+
+    # Midpoint of chord and distance from midpoint to start
+    mid = (starts + ends) / 2
+    chord_half = np.hypot(delta[:, 0], delta[:, 1]) / 2
+
+    # Only chords shorter than the diameter define a center
+    valid = chord_half < radius
+    mid, delta = mid[valid], delta[valid]
+
+    # Distance from midpoint to center
+    center_distance = np.sqrt(radius**2 - chord_half[valid]**2)
+
+    # Perpendicular direction (fixed X direction for near-vertical chords)
+    perp = np.column_stack((-delta[:, 1], delta[:, 0]))
+    perp[np.abs(delta[:, 0]) <= 0.001] = (1.0, 0.0)
+
+    # Normalize perpendicular vector
+    perp_length = np.hypot(perp[:, 0], perp[:, 1])
+    perp /= np.where(perp_length > 0, perp_length, 1.0)[:, None]
+
+    # Two possible centers per arc, kept next to each other
+    offset = perp * center_distance[:, None]
+    return np.stack((mid + offset, mid - offset), axis=1).reshape(-1, 2)
+
+def _bucket_centers_loop(centers, tol):
+    """Loop form of bucket_centers for Numba (float64 arrays only)"""
+    labels = np.empty(centers.shape[0], dtype=np.int64)
+    buckets = Dict.empty(key_type=BUCKET_KEY_TYPE, value_type=types.int64)
+
+    for i in range(centers.shape[0]):
+        key = (int(np.rint(centers[i, 0] / tol)), int(np.rint(centers[i, 1] / tol)))
+        label = buckets.get(key, -1)
+        if label < 0:
+            label = len(buckets)
+            buckets[key] = label
+        labels[i] = label
+
+    return labels
+
+def _bucket_centers_numpy(centers, tol):
+    """Vectorized form of bucket_centers"""
+    if not len(centers):
+        return np.empty(0, dtype=np.int64)
+
+    keys = np.rint(centers / tol).astype(np.int64)
+    _, first_index, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+
+    # Renumber buckets in order of first appearance
+    rank = np.empty(len(first_index), dtype=np.int64)
+    rank[np.argsort(first_index)] = np.arange(len(first_index))
+    return rank[inverse.reshape(-1)]
+
+def _trace_path_loop(indptr, indices, start, edge_count):
+    """Follow CSR adjacency from start, always taking the first neighbor that is not the previous vertex"""
+    path = np.empty(edge_count + 2, dtype=np.int64)
+    path[0] = start
+    length = 1
+    current = start
+    previous = -1
+
+    while True:
+        next_vertex = -1
+        for k in range(indptr[current], indptr[current + 1]):
+            if indices[k] != previous:
+                next_vertex = indices[k]
+                break
+        if next_vertex < 0:
+            break
+
+        if next_vertex == start and length > 2:
+            break  # Completed the loop
+
+        path[length] = next_vertex
+        length += 1
+        previous = current
+        current = next_vertex
+
+        if length > edge_count + 1:  # Prevent infinite loops
+            break
+
+    return path[:length]
+
+def _dedup_points_loop(points, tol):
+    """Drop points closer than tol to the last kept point (squared distances, no sqrt)"""
+    kept = np.empty_like(points)
+    if not points.shape[0]:
+        return kept
+    kept[0] = points[0]
+    count = 1
+    tol_sq = tol * tol
+
+    for i in range(1, points.shape[0]):
+        dx = points[i, 0] - kept[count - 1, 0]
+        dy = points[i, 1] - kept[count - 1, 1]
+        if dx * dx + dy * dy > tol_sq:
+            kept[count] = points[i]
+            count += 1
+
+    return kept[:count]
+
+def _mesh_normal_loop(verts, tris):
+    """Fused cross product and accumulation over all triangles, no (T, 3) temporaries"""
+    nx = 0.0
+    ny = 0.0
+    nz = 0.0
+
+    for i in prange(tris.shape[0]):
+        a, b, c = tris[i, 0], tris[i, 1], tris[i, 2]
+        ex = verts[b, 0] - verts[a, 0]
+        ey = verts[b, 1] - verts[a, 1]
+        ez = verts[b, 2] - verts[a, 2]
+        fx = verts[c, 0] - verts[a, 0]
+        fy = verts[c, 1] - verts[a, 1]
+        fz = verts[c, 2] - verts[a, 2]
+
+        cx = ey * fz - ez * fy
+        cy = ez * fx - ex * fz
+        cz = ex * fy - ey * fx
+
+        # Skip zero-area triangles
+        if cx * cx + cy * cy + cz * cz > 1e-24:
+            nx += cx
+            ny += cy
+            nz += cz
+
+    return np.array((nx, ny, nz))
+
+def _mesh_normal_numpy(verts, tris):
+    """Vectorized form of mesh_normal_sum"""
+    a, b, c = verts[tris[:, 0]], verts[tris[:, 1]], verts[tris[:, 2]]
+    normals = np.cross(b - a, c - a)
+
+    # Skip zero-area triangles
+    areas = np.linalg.norm(normals, axis=1)
+    return normals[areas > 1e-12].sum(axis=0)
+
+def _points_in_polygon_loop(px, py, polyx, polyy):
+    """Branchless crossing-number test, one query point per (parallel) iteration"""
+    n = polyx.shape[0]
+    inside = np.zeros(px.shape[0], dtype=np.bool_)
+
+    for k in prange(px.shape[0]):
+        x = px[k]
+        y = py[k]
+        crossings = False
+        for i in range(n):
+            j = i + 1 if i + 1 < n else 0
+            # Edge straddles the ray (min < y <= max); non-straddling edges may divide by zero,
+            # which only yields inf/nan under the numpy error model and is masked out
+            straddles = (polyy[i] < y) != (polyy[j] < y)
+            xinters = (y - polyy[i]) * (polyx[j] - polyx[i]) / (polyy[j] - polyy[i]) + polyx[i]
+            crossings ^= straddles & (x <= max(polyx[i], polyx[j])) & (x <= xinters)
+        inside[k] = crossings
+
+    return inside
+
+def _points_in_polygon_numpy(px, py, polyx, polyy):
+    """Vectorized form of points_in_polygon (points vectorized, loop over polygon edges)"""
+    inside = np.zeros(px.shape[0], dtype=np.bool_)
+    p2x = np.roll(polyx, -1)
+    p2y = np.roll(polyy, -1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for p1x, p1y, q2x, q2y in zip(polyx.tolist(), polyy.tolist(), p2x.tolist(), p2y.tolist()):
+            straddles = (p1y < py) != (q2y < py)
+            xinters = (py - p1y) * (q2x - p1x) / (q2y - p1y) + p1x if q2y != p1y else np.inf
+            inside ^= straddles & (px <= max(p1x, q2x)) & (px <= xinters)
+
+    return inside
+
+def _monotone_chain_loop(xy):
+    """Andrew's monotone chain over sorted unique points, returning hull indices"""
+    n = xy.shape[0]
+    hull = np.empty(2 * n, dtype=np.int64)
+    count = 0
+
+    # Lower hull left to right, then upper hull right to left; each pass drops its last point
+    for start, stop, step in ((0, n, 1), (n - 1, -1, -1)):
+        base = count
+        for i in range(start, stop, step):
+            while count - base >= 2:
+                o = hull[count - 2]
+                a = hull[count - 1]
+                cross = ((xy[a, 0] - xy[o, 0]) * (xy[i, 1] - xy[o, 1])
+                         - (xy[a, 1] - xy[o, 1]) * (xy[i, 0] - xy[o, 0]))
+                if cross > 0:
+                    break
+                count -= 1
+            hull[count] = i
+            count += 1
+        count -= 1
+
+    return hull[:count]
+
+def _flattest_axes(x_var, y_var, z_var):
+    """Axes kept when dropping the flattest one (ties prefer XY, then XZ)"""
+    if z_var <= x_var and z_var <= y_var:
+        return 0, 1
+    if y_var <= x_var:
+        return 0, 2
+    return 1, 2
+
+def _project_flattest_loop(verts):
+    """One pass for per-axis min/max, one pass writing the two kept columns"""
+    lo = verts[0].copy()
+    hi = verts[0].copy()
+    for i in range(1, verts.shape[0]):
+        for k in range(3):
+            value = verts[i, k]
+            if value < lo[k]:
+                lo[k] = value
+            elif value > hi[k]:
+                hi[k] = value
+
+    variations = hi - lo
+    keep_a, keep_b = _flattest_axes(variations[0], variations[1], variations[2])
+
+    out = np.empty((verts.shape[0], 2), dtype=np.float64)
+    for i in range(verts.shape[0]):
+        out[i, 0] = verts[i, keep_a]
+        out[i, 1] = verts[i, keep_b]
+    return out, variations
+
+def _project_flattest_numpy(verts):
+    """Vectorized form of project_flattest"""
+    variations = np.ptp(verts, axis=0)
+    keep_axes = list(_flattest_axes(*variations.tolist()))
+    return verts[:, keep_axes], variations
+
+# fastmath only where results are compared against a tolerance; kernels whose
+# exact sign/equality decisions must match the pure-Python rules stay strict
+if HAS_NUMBA:
+    _compute_arc_centers = njit(cache=True)(_compute_arc_centers_loop)
+    _bucket_centers = njit(cache=True)(_bucket_centers_loop)
+    _trace_path = njit(cache=True)(_trace_path_loop)
+    _dedup_points = njit(cache=True, fastmath=True)(_dedup_points_loop)
+    _mesh_normal = njit(parallel=True, cache=True, fastmath=True)(_mesh_normal_loop)
+    _points_in_polygon = njit(parallel=True, cache=True, error_model='numpy')(_points_in_polygon_loop)
+    _monotone_chain = njit(cache=True)(_monotone_chain_loop)
+    _flattest_axes = njit(cache=True)(_flattest_axes)
+    _project_flattest = njit(cache=True)(_project_flattest_loop)
+else:
+    _compute_arc_centers = _compute_arc_centers_numpy
+    _bucket_centers = _bucket_centers_numpy
+    _trace_path = _trace_path_loop
+    _dedup_points = _dedup_points_loop
+    _mesh_normal = _mesh_normal_numpy
+    _points_in_polygon = _points_in_polygon_numpy
+    _monotone_chain = _monotone_chain_loop
+    _project_flattest = _project_flattest_numpy
+
+# Below this many vertices the NumPy path beats compiled-function dispatch
+PROJECT_FLATTEST_MIN_COMPILED = 512
+
+def compute_arc_centers(starts, ends, radius):
+    """Return both candidate centers of every (start, end) chord as an (2K, 2) array"""
+    starts = np.ascontiguousarray(starts, dtype=np.float64).reshape(-1, 2)
+    ends = np.ascontiguousarray(ends, dtype=np.float64).reshape(-1, 2)
+    return _compute_arc_centers(starts, ends, float(radius))
+
+def bucket_centers(centers, tol):
+    """Label each center with its tol-sized grid bucket, numbered by first appearance"""
+    centers = np.ascontiguousarray(centers, dtype=np.float64).reshape(-1, 2)
+    return _bucket_centers(centers, float(tol))
+
+def dedup_points(points, tol):
+    """Remove consecutive near-duplicate 2D points from an (N, 2) polyline"""
+    points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+    return _dedup_points(points, float(tol))
+
+def mesh_normal_sum(vertices, triangles):
+    """Area-weighted (unnormalized) normal of a triangle mesh as a (3,) array"""
+    verts = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+    tris = np.ascontiguousarray(triangles, dtype=np.int64).reshape(-1, 3)
+    return _mesh_normal(verts, tris)
+
+def points_in_polygon(points, polygon):
+    """Boolean mask of the (N, 2) points that lie inside the polygon (ray casting)"""
+    pts = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+    poly = np.ascontiguousarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if not len(poly):
+        return np.zeros(len(pts), dtype=np.bool_)
+    return _points_in_polygon(pts[:, 0].copy(), pts[:, 1].copy(), poly[:, 0].copy(), poly[:, 1].copy())
+
+def monotone_chain(points):
+    """Convex hull indices (counter-clockwise) of (N, 2) points already sorted and deduplicated"""
+    xy = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+    return _monotone_chain(xy)
+
+def project_flattest(vertices):
+    """Drop the axis with the least variation: returns the (N, 2) projection and the per-axis variations"""
+    verts = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+    if len(verts) > PROJECT_FLATTEST_MIN_COMPILED:
+        return _project_flattest(verts)
+    return _project_flattest_numpy(verts)
+
+def cluster_centers(centers, tol):
+    """Group centers by merging touching tol-sized buckets (single linkage), labels by first appearance"""
+    centers = np.ascontiguousarray(centers, dtype=np.float64).reshape(-1, 2)
+    bucket_labels = bucket_centers(centers, tol)
+    if not len(bucket_labels):
+        return bucket_labels
+
+    # Grid key of every bucket, indexed by bucket label
+    first_index = np.unique(bucket_labels, return_index=True)[1]
+    keys = np.rint(centers[first_index] / tol).astype(np.int64).tolist()
+    bucket_of = {tuple(key): i for i, key in enumerate(keys)}
+
+    # Union-find over buckets; the root is always the earliest bucket of its component
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (kx, ky) in enumerate(keys):
+        for dx, dy in ((1, -1), (1, 0), (1, 1), (0, 1)):
+            j = bucket_of.get((kx + dx, ky + dy))
+            if j is not None:
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    roots = np.array([find(i) for i in range(len(keys))], dtype=np.int64)
+    component = np.unique(roots, return_inverse=True)[1].reshape(-1)
+    return component[bucket_labels]
+
+def find_boundary_edges(triangles):
+    """Return the edges used by exactly one triangle as a (K, 2) array, in first-appearance order"""
+    tris = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if not len(tris):
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Each triangle contributes (0,1), (1,2), (2,0), with vertex indices sorted per edge
+    edges = np.sort(tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    unique_edges, first_index, counts = np.unique(edges, axis=0, return_index=True, return_counts=True)
+
+    once = counts == 1
+    return unique_edges[once][np.argsort(first_index[once])]
+
+def trace_edge_path(edges):
+    """Chain (K, 2) edges into a vertex index path, starting at the first vertex with degree <= 2"""
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if not len(edges):
+        return np.empty(0, dtype=np.int64)
+
+    # CSR adjacency; a stable sort keeps every neighbor list in edge order
+    src = edges.reshape(-1)
+    dst = edges[:, ::-1].reshape(-1)
+    indices = dst[np.argsort(src, kind='stable')]
+    degree = np.bincount(src)
+    indptr = np.zeros(len(degree) + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+
+    # Start from the first vertex (in order of appearance) with at most two neighbors
+    vertices, first_index = np.unique(src, return_index=True)
+    vertices = vertices[np.argsort(first_index)]
+    candidates = vertices[degree[vertices] <= 2]
+    start = candidates[0] if len(candidates) else vertices[0]
+
+    return _trace_path(indptr, indices, int(start), len(edges))
@@ -0,0 +1,302 @@
+"""
+Tests for the session store and the Flask routes
+"""
+
+import gzip
+import io
+import os
+import stat
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import app
+
+STEP_FILE = b"""ISO-10303-21;
+HEADER;
+FILE_DESCRIPTION((''),'2;1');
+ENDSEC;
+DATA;
+#1=ADVANCED_FACE('',(#2),#3,.T.);
+#2=FACE_OUTER_BOUND('',#4,.T.);
+#5=CIRCLE('',#6,5.);
+#7=LINE('',#8,#9);
+#10=ADVANCED_FACE('',(#2),#3,.T.);
+ENDSEC;
+END-ISO-10303-21;
+"""
+
+@pytest.fixture
+def client(monkeypatch):
+    # The manual parser keeps these tests independent of pythonocc
+    monkeypatch.setattr(app, 'HAS_PYTHONOCC', False)
+    return app.app.test_client()
+
+def post_upload(client, data=STEP_FILE):
+    return client.post('/api/upload', data={'file': (io.BytesIO(data), 'part.step')},
+                       content_type='multipart/form-data')
+
+def upload(client, data=STEP_FILE):
+    """Upload a STEP file, wait for the load job and return the session ID"""
+    response = post_upload(client, data)
+    assert response.status_code == 202
+    session_id = response.get_json()['session_id']
+    app.sessions.get(session_id)['job'].result(timeout=30)
+    return session_id
+
+# SessionLRU
+
+def make_session(tmp_path, name, job=None):
+    processor = app.STEPProcessor()
+    processor.face_data = [{'id': 0}]
+    cache_dir = tmp_path / name
+    cache_dir.mkdir()
+    if job is None:
+        job = Future()
+        job.set_result({})
+    return {'processor': processor, 'cache_dir': str(cache_dir), 'job': job}
+
+def test_session_store_evicts_least_recently_used(tmp_path):
+    store = app.SessionLRU(2)
+    a, b, c = (make_session(tmp_path, name) for name in 'abc')
+    store['a'] = a
+    store['b'] = b
+    store['a']  # a is now the most recently used
+    store['c'] = c
+
+    assert 'b' not in store
+    assert 'a' in store and 'c' in store
+    assert len(store) == 2
+    assert not os.path.exists(b['cache_dir'])
+    assert os.path.exists(a['cache_dir'])
+
+def test_session_store_expires_idle_sessions(tmp_path):
+    store = app.SessionLRU(4, ttl=0.05)
+    session = make_session(tmp_path, 'a')
+    store['a'] = session
+    assert 'a' in store
+
+    time.sleep(0.1)
+    assert 'a' not in store
+    assert len(store) == 0
+    assert not os.path.exists(session['cache_dir'])
+
+    # Requests that looked the session up before it expired can keep using the processor
+    assert session['processor'].face_data == [{'id': 0}]
+
+def test_session_evicted_before_its_load_starts_is_cancelled(tmp_path):
+    store = app.SessionLRU(1)
+    store['a'] = queued = make_session(tmp_path, 'a', Future())
+    store['b'] = make_session(tmp_path, 'b')
+
+    assert queued['job'].cancelled()
+    assert not os.path.exists(queued['cache_dir'])
+
+def test_session_evicted_while_loading_is_cleaned_up_after_the_load(tmp_path):
+    store = app.SessionLRU(1)
+    job = Future()
+    job.set_running_or_notify_cancel()
+    store['a'] = loading = make_session(tmp_path, 'a', job)
+    store['b'] = make_session(tmp_path, 'b')
+
+    assert 'a' not in store
+    assert os.path.exists(loading['cache_dir'])
+    job.set_result({})
+    assert not os.path.exists(loading['cache_dir'])
+
+# Mesh cache
+
+def make_processor(seed):
+    processor = app.STEPProcessor()
+    vertices = np.random.default_rng(seed).normal(size=(300, 3))
+    processor.face_data = [{'id': 0, 'type': 'Plane', 'is_plane': True, 'normal': [0.0, 0.0, 1.0],
+                            'mesh': app.mesh_arrays(vertices, np.arange(300).reshape(-1, 3))}]
+    return processor
+
+def test_mesh_cache_is_compressed_and_bounded_by_size(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'MESH_CACHE_DIR', str(tmp_path / 'mesh_cache'))
+    make_processor(1).store_cached_face_data('a')
+    first_path = tmp_path / 'mesh_cache' / 'a.npz'
+    with zipfile.ZipFile(first_path) as archive:
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in archive.infolist())
+
+    # Room for two entries: storing a third evicts the least recently used one
+    monkeypatch.setattr(app, 'MESH_CACHE_MAX_BYTES', first_path.stat().st_size * 5 // 2)
+    os.utime(first_path, (1000, 1000))
+    make_processor(2).store_cached_face_data('b')
+    os.utime(tmp_path / 'mesh_cache' / 'b.npz', (2000, 2000))
+    processor = make_processor(3)
+    processor.store_cached_face_data('c')
+
+    assert sorted(os.listdir(tmp_path / 'mesh_cache')) == ['b.npz', 'c.npz']
+    face_data = app.STEPProcessor().load_cached_face_data('c')
+    np.testing.assert_array_equal(face_data[0]['mesh']['vertices'], processor.face_data[0]['mesh']['vertices'])
+
+# Upload and load jobs
+
+def test_upload_is_loaded_in_the_background(client):
+    response = post_upload(client)
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status'] == 'processing'
+
+    session_id = body['session_id']
+    for _ in range(600):
+        status = client.get(f'/api/job-status/{session_id}')
+        if status.get_json()['status'] != 'processing':
+            break
+        time.sleep(0.05)
+
+    assert status.status_code == 200
+    result = status.get_json()
+    assert result['status'] == 'done'
+    assert result['session_id'] == session_id
+    assert len(result['faces']) == len(app.sessions.get(session_id)['processor'].face_data) > 0
+
+@pytest.fixture
+def blocked_loads(monkeypatch):
+    """Replace the load pool with one worker that is busy until the test ends"""
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(release.wait)
+    monkeypatch.setattr(app, '_load_executor', executor)
+    yield
+    release.set()
+    executor.shutdown()
+
+def test_upload_refused_while_load_queue_is_full(client, monkeypatch, blocked_loads):
+    monkeypatch.setattr(app, '_load_slots', threading.BoundedSemaphore(1))
+    assert post_upload(client).status_code == 202
+
+    response = post_upload(client)
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert 'error' in response.get_json()
+
+def test_evicted_upload_is_cancelled_and_frees_its_queue_slot(client, monkeypatch, blocked_loads):
+    monkeypatch.setattr(app, '_load_slots', threading.BoundedSemaphore(2))
+    monkeypatch.setattr(app, 'sessions', app.SessionLRU(1))
+    first = post_upload(client).get_json()['session_id']
+    job = app.sessions.get(first)['job']
+    assert post_upload(client).status_code == 202
+
+    assert first not in app.sessions
+    assert job.cancelled()
+    assert post_upload(client).status_code == 202
+
+def test_job_status_unknown_and_invalid_session(client):
+    assert client.get('/api/job-status/00000000-0000-4000-8000-000000000000').status_code == 404
+    assert client.get('/api/job-status/not-a-session').status_code == 400
+
+# Previews
+
+def test_face_info_cache_is_bounded(client, monkeypatch):
+    monkeypatch.setattr(app, 'PREVIEW_CACHE_MAX_ENTRIES', 1)
+    session_id = upload(client)
+    first = client.get(f'/api/face-info/{session_id}/0')
+    second = client.get(f'/api/face-info/{session_id}/1')
+
+    assert first.get_json()['id'] == 0 and second.get_json()['id'] == 1
+    assert list(app.sessions.get(session_id)['processor']._face_info_cache) == [1]
+    assert client.get(f'/api/face-info/{session_id}/0').data == first.data
+
+
+def test_preview_batch(client, monkeypatch):
+    monkeypatch.setattr(app, 'PREVIEW_BATCH_MAX_FACES', 2)
+    session_id = upload(client)
+    response = client.get(f'/api/preview-dxf-batch/{session_id}?faces=0,1')
+    assert response.status_code == 200
+    previews = response.get_json()['previews']
+    assert sorted(previews) == ['0', '1']
+    assert previews['1'] == client.get(f'/api/preview-dxf/{session_id}/1').get_json()['preview']
+
+    assert client.get(f'/api/preview-dxf-batch/{session_id}?faces=0,1,2').status_code == 400
+    assert client.get(f'/api/preview-dxf-batch/{session_id}?faces=0,x').status_code == 400
+    assert client.get(f'/api/preview-dxf-batch/{session_id}?faces=99').status_code == 400
+
+# Export cache
+
+def test_export_is_generated_once_and_served_from_cache(client, monkeypatch):
+    session_id = upload(client)
+    calls = []
+    export_face_to_svg = app.STEPProcessor.export_face_to_svg
+
+    def counting_export(self, face_id):
+        calls.append(face_id)
+        return export_face_to_svg(self, face_id)
+
+    monkeypatch.setattr(app.STEPProcessor, 'export_face_to_svg', counting_export)
+    first = client.get(f'/api/export-face/{session_id}/1?format=svg')
+    second = client.get(f'/api/export-face/{session_id}/1?format=svg')
+
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert b'<svg' in first.data
+    assert calls == [1]
+    assert os.path.exists(os.path.join(app.sessions[session_id]['cache_dir'], '1.svg'))
+
+def test_export_conditional_request(client):
+    session_id = upload(client)
+    response = client.get(f'/api/export-face/{session_id}/1?format=dxf')
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+
+    repeat = client.get(f'/api/export-face/{session_id}/1?format=dxf',
+                        headers={'If-None-Match': response.headers['ETag']})
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+
+def test_export_gzip_negotiation(client):
+    session_id = upload(client)
+    plain = client.get(f'/api/export-face/{session_id}/1?format=svg')
+    encoded = client.get(f'/api/export-face/{session_id}/1?format=svg', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert plain.content_encoding is None
+    assert encoded.content_encoding == 'gzip'
+    assert gzip.decompress(encoded.data) == plain.data
+    assert 'Accept-Encoding' in plain.vary and 'Accept-Encoding' in encoded.vary
+
+def test_export_gzip_refused_with_q0(client):
+    session_id = upload(client)
+    response = client.get(f'/api/export-face/{session_id}/1?format=svg', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+
+    assert response.content_encoding is None
+    assert b'<svg' in response.data
+
+@pytest.mark.parametrize('file_mode, dir_mode', [(0o600, 0o700), (0o640, 0o750)])
+def test_export_cache_permissions(client, monkeypatch, file_mode, dir_mode):
+    monkeypatch.setattr(app, 'EXPORT_FILE_MODE', file_mode)
+    monkeypatch.setattr(app, 'EXPORT_DIR_MODE', dir_mode)
+    session_id = upload(client)
+    assert client.get(f'/api/export-face/{session_id}/1?format=svg').status_code == 200
+
+    cache_dir = app.sessions.get(session_id)['cache_dir']
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == dir_mode
+    for name in ('1.svg', '1.svg.gz'):
+        assert stat.S_IMODE(os.stat(os.path.join(cache_dir, name)).st_mode) == file_mode
+
+def test_export_accel_redirect_is_never_gzipped(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'EXPORT_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(app, 'EXPORT_ACCEL_PREFIX', '/internal_files/')
+    session_id = upload(client)
+    response = client.get(f'/api/export-face/{session_id}/1?format=svg', headers={'Accept-Encoding': 'gzip'})
+
+    cache_dir = os.path.basename(app.sessions.get(session_id)['cache_dir'])
+    assert response.headers['X-Accel-Redirect'] == f'/internal_files/{cache_dir}/1.svg'
+    assert response.content_encoding is None
+    assert response.data == b''
+
+# Upload limits
+
+def test_oversized_upload_gets_json_413(client, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'MAX_CONTENT_LENGTH', 1024 * 1024)
+    data = STEP_FILE + b' ' * (1024 * 1024)
+    response = post_upload(client, data)
+
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'File too large (maximum 1MB)'}
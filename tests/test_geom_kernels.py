@@ -0,0 +1,435 @@
+"""
+Equivalence tests for geom_kernels
+Each compiled kernel is checked against its NumPy/Python fallback and against
+the scalar code it replaced in app.py, on fixed inputs
+"""
+
+import numpy as np
+import pytest
+
+import geom_kernels
+
+requires_numba = pytest.mark.skipif(not geom_kernels.HAS_NUMBA, reason='numba is not installed')
+
+# compute_arc_centers
+
+def old_arc_centers(arcs, radius):
+    """consolidate_circle_arcs center candidates as they were before the kernel"""
+    centers = []
+    for start_x, start_y, end_x, end_y in arcs:
+        mid_x = (start_x + end_x) / 2
+        mid_y = (start_y + end_y) / 2
+        chord_half = ((end_x - start_x)**2 + (end_y - start_y)**2)**0.5 / 2
+        if chord_half < radius:
+            center_distance = (radius**2 - chord_half**2)**0.5
+            if abs(end_x - start_x) > 0.001:
+                perp_x = -(end_y - start_y)
+                perp_y = (end_x - start_x)
+            else:
+                perp_x = 1
+                perp_y = 0
+            perp_length = (perp_x**2 + perp_y**2)**0.5
+            if perp_length > 0:
+                perp_x /= perp_length
+                perp_y /= perp_length
+            centers.append((mid_x + perp_x * center_distance, mid_y + perp_y * center_distance))
+            centers.append((mid_x - perp_x * center_distance, mid_y - perp_y * center_distance))
+    return centers
+
+ARC_RADIUS = 5.0
+ARC_ANGLES = np.linspace(0, 6, 13)
+ARCS = np.vstack((
+    # Chords of a circle at (3, -2)
+    np.column_stack((3 + ARC_RADIUS * np.cos(ARC_ANGLES), -2 + ARC_RADIUS * np.sin(ARC_ANGLES),
+                     3 + ARC_RADIUS * np.cos(ARC_ANGLES + 0.4), -2 + ARC_RADIUS * np.sin(ARC_ANGLES + 0.4))),
+    [[0.0, 0.0, 0.0, 4.0],       # vertical chord
+     [0.0, 0.0, 0.0005, 3.0],    # below the near-vertical threshold
+     [1.0, 1.0, 1.0, 1.0],       # zero-length chord
+     [0.0, 0.0, 10.0, 0.0],      # exactly the diameter (no center)
+     [0.0, 0.0, 20.0, 5.0]],     # longer than the diameter
+))
+
+def test_arc_centers_numpy_matches_old_scalar():
+    expected = np.array(old_arc_centers(ARCS.tolist(), ARC_RADIUS))
+    result = geom_kernels._compute_arc_centers_numpy(ARCS[:, :2], ARCS[:, 2:], ARC_RADIUS)
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
+
+@requires_numba
+def test_arc_centers_compiled_matches_numpy():
+    expected = geom_kernels._compute_arc_centers_numpy(ARCS[:, :2], ARCS[:, 2:], ARC_RADIUS)
+    result = geom_kernels.compute_arc_centers(ARCS[:, :2], ARCS[:, 2:], ARC_RADIUS)
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
+
+def test_arc_centers_empty():
+    for kernel in (geom_kernels.compute_arc_centers, geom_kernels._compute_arc_centers_numpy):
+        assert kernel(np.empty((0, 2)), np.empty((0, 2)), ARC_RADIUS).shape == (0, 2)
+
+# bucket_centers
+
+def old_bucket_labels(centers, tolerance):
+    """Grid hash buckets as consolidate_circle_arcs keyed them, numbered by first appearance"""
+    buckets = {}
+    return [buckets.setdefault((round(cx / tolerance), round(cy / tolerance)), len(buckets)) for cx, cy in centers]
+
+BUCKET_CENTERS = np.vstack((
+    np.random.default_rng(18).uniform(-1, 1, size=(400, 2)),
+    # Exactly on bucket edges, where rounding ties go to even
+    [[0.05, 0.15], [-0.25, 0.35], [0.45, -0.05], [0.0, 0.0]],
+))
+
+def test_bucket_centers_numpy_matches_old_scalar():
+    expected = old_bucket_labels(BUCKET_CENTERS.tolist(), 0.1)
+    assert geom_kernels._bucket_centers_numpy(BUCKET_CENTERS, 0.1).tolist() == expected
+
+@requires_numba
+def test_bucket_centers_compiled_matches_numpy():
+    expected = geom_kernels._bucket_centers_numpy(BUCKET_CENTERS, 0.1)
+    np.testing.assert_array_equal(geom_kernels.bucket_centers(BUCKET_CENTERS, 0.1), expected)
+
+def test_bucket_centers_empty():
+    for kernel in (geom_kernels.bucket_centers, geom_kernels._bucket_centers_numpy):
+        assert kernel(np.empty((0, 2)), 0.1).shape == (0,)
+
+# find_boundary_edges
+
+def old_boundary_edges(triangles):
+    """Edges used by exactly one triangle, counted in a dict as the preview code did before the kernel"""
+    edge_count = {}
+    for triangle in triangles:
+        edges = [
+            (min(triangle[0], triangle[1]), max(triangle[0], triangle[1])),
+            (min(triangle[1], triangle[2]), max(triangle[1], triangle[2])),
+            (min(triangle[2], triangle[0]), max(triangle[2], triangle[0]))
+        ]
+        for edge in edges:
+            edge_count[edge] = edge_count.get(edge, 0) + 1
+    return [edge for edge, count in edge_count.items() if count == 1]
+
+def grid_triangles(n, holes=()):
+    """Two triangles per cell of an n x n vertex grid, skipping the cells listed in holes"""
+    triangles = []
+    for row in range(n - 1):
+        for col in range(n - 1):
+            if (row, col) in holes:
+                continue
+            a = row * n + col
+            triangles.append([a, a + 1, a + n + 1])
+            triangles.append([a, a + n + 1, a + n])
+    return triangles
+
+MESHES = {
+    'grid': grid_triangles(6),
+    'grid_with_hole': grid_triangles(7, holes={(2, 2), (2, 3), (3, 2)}),
+    'single_triangle': [[0, 1, 2]],
+    'random': np.random.default_rng(104).integers(0, 40, size=(150, 3)).tolist(),
+}
+
+@pytest.mark.parametrize('name', sorted(MESHES))
+def test_boundary_edges_match_old_scalar(name):
+    expected = old_boundary_edges(MESHES[name])
+    assert list(map(tuple, geom_kernels.find_boundary_edges(MESHES[name]).tolist())) == expected
+
+def test_boundary_edges_empty():
+    assert geom_kernels.find_boundary_edges([]).shape == (0, 2)
+
+# trace_edge_path
+
+def old_edges_to_path(edges):
+    """edges_to_path as it was before the kernel, returning vertex indices"""
+    adjacency = {}
+    for v1, v2 in edges:
+        adjacency.setdefault(v1, []).append(v2)
+        adjacency.setdefault(v2, []).append(v1)
+
+    start_vertex = next((vertex for vertex, neighbors in adjacency.items() if len(neighbors) <= 2), None)
+    if start_vertex is None:
+        start_vertex = list(adjacency.keys())[0]
+
+    path = [start_vertex]
+    current = start_vertex
+    previous = None
+    while True:
+        neighbors = [n for n in adjacency[current] if n != previous]
+        if not neighbors:
+            break
+        next_vertex = neighbors[0]
+        if next_vertex == start_vertex and len(path) > 2:
+            break
+        path.append(next_vertex)
+        previous = current
+        current = next_vertex
+        if len(path) > len(edges) + 1:
+            break
+    return path
+
+EDGE_SETS = {
+    'closed_loop': [(3, 7), (7, 1), (1, 4), (4, 9), (9, 3)],
+    'open_chain': [(5, 2), (2, 8), (8, 0), (0, 6)],
+    'branch': [(0, 1), (1, 2), (2, 3), (1, 4), (4, 5), (5, 0)],
+    'two_loops': [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3)],
+    'all_high_degree': [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)],
+    'grid_with_hole': old_boundary_edges(MESHES['grid_with_hole']),
+}
+
+@pytest.mark.parametrize('name', sorted(EDGE_SETS))
+def test_trace_edge_path_matches_old_scalar(name):
+    expected = old_edges_to_path(EDGE_SETS[name])
+    assert geom_kernels.trace_edge_path(EDGE_SETS[name]).tolist() == expected
+
+@requires_numba
+@pytest.mark.parametrize('name', sorted(EDGE_SETS))
+def test_trace_edge_path_compiled_matches_python(name, monkeypatch):
+    expected = geom_kernels.trace_edge_path(EDGE_SETS[name])
+    monkeypatch.setattr(geom_kernels, '_trace_path', geom_kernels._trace_path_loop)
+    np.testing.assert_array_equal(geom_kernels.trace_edge_path(EDGE_SETS[name]), expected)
+
+def test_trace_edge_path_empty():
+    assert geom_kernels.trace_edge_path([]).shape == (0,)
+
+# cluster_centers
+
+def old_center_groups(centers, tolerance):
+    """Pairwise grouping against each group's first center, as consolidate_circle_arcs did originally"""
+    center_groups = []
+    for cx, cy in centers:
+        for group in center_groups:
+            group_cx, group_cy = group[0]
+            if abs(cx - group_cx) < tolerance and abs(cy - group_cy) < tolerance:
+                group.append((cx, cy))
+                break
+        else:
+            center_groups.append([(cx, cy)])
+    return center_groups
+
+CLUSTER_RNG = np.random.default_rng(110)
+
+# Tight groups far apart, in interleaved order, some straddling a bucket edge
+CLUSTER_SEEDS = np.array([(0.0, 0.0), (5.0, 5.0), (-3.0, 7.55), (12.25, -4.05)])
+CLUSTERED_CENTERS = (CLUSTER_SEEDS + CLUSTER_RNG.uniform(-0.02, 0.02, size=(10, len(CLUSTER_SEEDS), 2))).reshape(-1, 2)
+
+def test_cluster_centers_matches_old_grouping():
+    labels = geom_kernels.cluster_centers(CLUSTERED_CENTERS, 0.1)
+    groups = old_center_groups(CLUSTERED_CENTERS.tolist(), 0.1)
+
+    # Same partition, both numbered by first appearance
+    assert labels.max() + 1 == len(groups)
+    for label, group in enumerate(groups):
+        np.testing.assert_array_equal(CLUSTERED_CENTERS[labels == label], np.array(group))
+
+@requires_numba
+def test_cluster_centers_compiled_matches_numpy(monkeypatch):
+    centers = np.vstack((CLUSTERED_CENTERS, CLUSTER_RNG.uniform(-1, 1, size=(300, 2))))
+    expected = geom_kernels.cluster_centers(centers, 0.1)
+    monkeypatch.setattr(geom_kernels, '_bucket_centers', geom_kernels._bucket_centers_numpy)
+    np.testing.assert_array_equal(geom_kernels.cluster_centers(centers, 0.1), expected)
+
+def test_cluster_centers_empty():
+    assert geom_kernels.cluster_centers(np.empty((0, 2)), 0.1).shape == (0,)
+
+# dedup_points
+
+def old_dedup(points_2d):
+    """add_curve_as_polyline's consecutive-duplicate filter as it was before the kernel"""
+    if not points_2d:
+        return []
+    clean_points = [points_2d[0]]
+    for curr in points_2d[1:]:
+        prev = clean_points[-1]
+        dist = ((curr[0] - prev[0])**2 + (curr[1] - prev[1])**2)**0.5
+        if dist > 0.001:
+            clean_points.append(curr)
+    return clean_points
+
+POLYLINE = np.vstack([
+    [[0.0, 0.0], [0.0, 0.0], [0.0005, 0.0], [0.002, 0.0], [0.002, 0.0009], [1.0, 1.0], [1.0, 1.0]],
+    np.cumsum(np.random.default_rng(113).normal(scale=0.002, size=(200, 2)), axis=0),
+])
+
+def test_dedup_matches_old_scalar():
+    expected = np.array(old_dedup(POLYLINE.tolist()))
+    np.testing.assert_array_equal(geom_kernels.dedup_points(POLYLINE, 0.001), expected)
+
+@requires_numba
+def test_dedup_compiled_matches_python():
+    expected = geom_kernels._dedup_points.py_func(POLYLINE, 0.001)
+    np.testing.assert_array_equal(geom_kernels.dedup_points(POLYLINE, 0.001), expected)
+
+def test_dedup_empty():
+    assert geom_kernels.dedup_points(np.empty((0, 2)), 0.001).shape == (0, 2)
+
+# mesh_normal_sum
+
+def old_normal_sum(vertices, triangles):
+    """Per-triangle cross products summed in Python, skipping zero-area triangles"""
+    total = [0.0, 0.0, 0.0]
+    for a, b, c in triangles:
+        e = [vertices[b][k] - vertices[a][k] for k in range(3)]
+        f = [vertices[c][k] - vertices[a][k] for k in range(3)]
+        n = (e[1] * f[2] - e[2] * f[1], e[2] * f[0] - e[0] * f[2], e[0] * f[1] - e[1] * f[0])
+        if (n[0]**2 + n[1]**2 + n[2]**2)**0.5 > 1e-12:
+            total = [t + v for t, v in zip(total, n)]
+    return total
+
+NORMAL_RNG = np.random.default_rng(120)
+NORMAL_VERTICES = np.vstack((
+    NORMAL_RNG.normal(size=(60, 3)),
+    [[1.0, 1.0, 1.0], [2.0, 2.0, 2.0], [3.0, 3.0, 3.0]],   # collinear: zero area
+))
+NORMAL_TRIANGLES = np.vstack((
+    NORMAL_RNG.integers(0, 60, size=(500, 3)),
+    [[60, 61, 62], [5, 5, 7], [9, 9, 9]],                   # zero-area triangles
+))
+
+def test_mesh_normal_numpy_matches_old_scalar():
+    expected = old_normal_sum(NORMAL_VERTICES.tolist(), NORMAL_TRIANGLES.tolist())
+    result = geom_kernels._mesh_normal_numpy(NORMAL_VERTICES, NORMAL_TRIANGLES)
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-9)
+
+@requires_numba
+def test_mesh_normal_compiled_matches_numpy():
+    expected = geom_kernels._mesh_normal_numpy(NORMAL_VERTICES, NORMAL_TRIANGLES)
+    result = geom_kernels.mesh_normal_sum(NORMAL_VERTICES, NORMAL_TRIANGLES)
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-9)
+
+def test_mesh_normal_empty():
+    for kernel in (geom_kernels.mesh_normal_sum, geom_kernels._mesh_normal_numpy):
+        assert kernel(np.empty((0, 3)), np.empty((0, 3), dtype=np.int64)).tolist() == [0.0, 0.0, 0.0]
+
+# points_in_polygon
+
+def old_point_in_polygon(point, polygon):
+    """Scalar ray casting as detect_holes_in_face used it before the kernel"""
+    x, y = point
+    n = len(polygon)
+    inside = False
+    p1x, p1y = polygon[0]
+    for i in range(1, n + 1):
+        p2x, p2y = polygon[i % n]
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if p1x == p2x or x <= xinters:
+                        inside = not inside
+        p1x, p1y = p2x, p2y
+    return inside
+
+POLYGONS = {
+    'square': [(0, 0), (4, 0), (4, 4), (0, 4)],
+    'concave': [(0, 0), (6, 0), (6, 6), (3, 2), (0, 6)],
+    'self_intersecting': [(0, 0), (4, 4), (4, 0), (0, 4)],
+    'repeated_vertices': [(0, 0), (0, 0), (4, 0), (4, 0), (4, 4), (0, 4)],
+    'single_point': [(1, 1)],
+    'segment': [(0, 0), (4, 4)],
+    'collinear': [(0, 0), (2, 2), (4, 4)],
+    'zero_area': [(0, 0), (4, 0), (4, 0), (0, 0)],
+    'horizontal_edges': [(0, 0), (2, 0), (2, 2), (4, 2), (4, 4), (0, 4)],
+}
+
+# Half-unit grid including every vertex, edge and the outside margin
+GRID = np.array([(x / 2, y / 2) for x in range(-2, 14) for y in range(-2, 14)])
+
+@pytest.mark.parametrize('name', sorted(POLYGONS))
+def test_points_in_polygon_matches_old_scalar(name):
+    polygon = POLYGONS[name]
+    expected = [old_point_in_polygon(point, polygon) for point in GRID.tolist()]
+    assert geom_kernels.points_in_polygon(GRID, polygon).tolist() == expected
+
+@pytest.mark.parametrize('name', sorted(POLYGONS))
+def test_points_in_polygon_numpy_matches_old_scalar(name):
+    poly = np.array(POLYGONS[name], dtype=np.float64)
+    expected = [old_point_in_polygon(point, POLYGONS[name]) for point in GRID.tolist()]
+    result = geom_kernels._points_in_polygon_numpy(GRID[:, 0].copy(), GRID[:, 1].copy(), poly[:, 0].copy(), poly[:, 1].copy())
+    assert result.tolist() == expected
+
+def test_points_in_polygon_empty():
+    assert geom_kernels.points_in_polygon(np.empty((0, 2)), POLYGONS['square']).shape == (0,)
+    assert geom_kernels.points_in_polygon(GRID, np.empty((0, 2))).tolist() == [False] * len(GRID)
+
+# monotone_chain
+
+def old_convex_hull(points):
+    """extract_boundary's monotone chain, without the len(points) < 3 early return app.py keeps in front of the kernel"""
+    def cross_product(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    points = sorted(set(points))
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and cross_product(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and cross_product(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+HULL_INPUTS = {
+    'random': [tuple(p) for p in np.random.default_rng(209).integers(-20, 20, size=(300, 2)).tolist()],
+    'square_with_edge_points': [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (1, 2), (0, 2), (0, 1), (1, 1)],
+    'collinear': [(0, 0), (1, 1), (2, 2), (3, 3)],
+    'two_points': [(0, 0), (1, 2)],
+    'single_point': [(5, 5)],
+    'empty': [],
+}
+
+@pytest.mark.parametrize('name', sorted(HULL_INPUTS))
+def test_monotone_chain_matches_old_scalar(name):
+    pts = np.array(sorted(set(HULL_INPUTS[name])), dtype=np.float64).reshape(-1, 2)
+    expected = old_convex_hull(HULL_INPUTS[name])
+    assert list(map(tuple, pts[geom_kernels.monotone_chain(pts)].tolist())) == expected
+
+@requires_numba
+@pytest.mark.parametrize('name', sorted(HULL_INPUTS))
+def test_monotone_chain_compiled_matches_python(name):
+    pts = np.array(sorted(set(HULL_INPUTS[name])), dtype=np.float64).reshape(-1, 2)
+    expected = geom_kernels._monotone_chain.py_func(pts)
+    np.testing.assert_array_equal(geom_kernels.monotone_chain(pts), expected)
+
+# project_flattest
+
+def old_project_to_2d(vertices):
+    """simple_project_to_2d's flattest-axis projection as it was before the kernel"""
+    x_var = max(v[0] for v in vertices) - min(v[0] for v in vertices)
+    y_var = max(v[1] for v in vertices) - min(v[1] for v in vertices)
+    z_var = max(v[2] for v in vertices) - min(v[2] for v in vertices)
+    if z_var <= x_var and z_var <= y_var:
+        return [(v[0], v[1]) for v in vertices]
+    elif y_var <= x_var:
+        return [(v[0], v[2]) for v in vertices]
+    else:
+        return [(v[1], v[2]) for v in vertices]
+
+PROJECT_RNG = np.random.default_rng(213)
+LARGE = geom_kernels.PROJECT_FLATTEST_MIN_COMPILED + 100
+
+PROJECT_INPUTS = {
+    'flat_z': PROJECT_RNG.normal(size=(50, 3)) * (4.0, 3.0, 0.01),
+    'flat_y': PROJECT_RNG.normal(size=(50, 3)) * (4.0, 0.01, 3.0),
+    'flat_x': PROJECT_RNG.normal(size=(50, 3)) * (0.01, 4.0, 3.0),
+    'large_flat_y': PROJECT_RNG.normal(size=(LARGE, 3)) * (4.0, 0.01, 3.0),
+    'large_flat_x': PROJECT_RNG.normal(size=(LARGE, 3)) * (0.01, 4.0, 3.0),
+    'tie_all': np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]]),
+    'tie_xy': np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 2.0]]),
+    'single_point': np.array([[1.0, 2.0, 3.0]]),
+}
+
+@pytest.mark.parametrize('name', sorted(PROJECT_INPUTS))
+def test_project_flattest_matches_old_scalar(name):
+    vertices = PROJECT_INPUTS[name]
+    expected = old_project_to_2d(vertices.tolist())
+    projected, variations = geom_kernels.project_flattest(vertices)
+    assert list(map(tuple, projected.tolist())) == expected
+    np.testing.assert_array_equal(variations, np.ptp(vertices, axis=0))
+
+@requires_numba
+@pytest.mark.parametrize('name', sorted(PROJECT_INPUTS))
+def test_project_flattest_compiled_matches_numpy(name):
+    vertices = np.ascontiguousarray(PROJECT_INPUTS[name])
+    expected = geom_kernels._project_flattest_numpy(vertices)
+    result = geom_kernels._project_flattest(vertices)
+    np.testing.assert_array_equal(result[0], expected[0])
+    np.testing.assert_array_equal(result[1], expected[1])